@@ -0,0 +1,97 @@
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from fleet import relative_job_path, report_filename, summary_row, write_summary
+from jenkins_fetch import job_key
+
+# Ennyi folyamat rajzol egyszerre, 0 = a CPU magok száma
+BATCH_WORKERS = int(os.getenv("JENKINS_BATCH_WORKERS", "0"))
+BATCH_TITLE = "Jenkins Pipeline Stage Időtartamok - {name}"
+
+_worker_store = None
+
+
+def _init_worker(store_path):
+    # Minden folyamat a saját SQLite kapcsolatával olvassa ugyanazt a store fájlt (WAL módban
+    # az olvasók nem blokkolják egymást), a matplotlib ablak nélkül rajzol
+    global _worker_store
+    import matplotlib
+    matplotlib.use('Agg')
+
+    from build_store import BuildStore
+
+    _worker_store = BuildStore(store_path)
+
+
+def render_pair(old_url, new_url, name, output_dir, last_n=None, resamples=0, charts=True):
+    # Egy job pár teljes riportja: diagram (PNG), szöveges összefoglaló (TXT) és CSV
+    from report import (export_comparison_csv, plot_comparison, prepare_comparison, print_build_table,
+                        print_stage_averages)
+
+    start = time.perf_counter()
+    df_regi = _worker_store.load_frame(*job_key(old_url), "Régi Job", last_n=last_n)
+    df_uj = _worker_store.load_frame(*job_key(new_url), "Új Job", last_n=last_n)
+    if df_regi.empty or df_uj.empty:
+        return name, None, time.perf_counter() - start
+    df_regi, df_uj, all_stages = prepare_comparison(df_regi, df_uj, last_n=last_n)
+    base = os.path.join(output_dir, report_filename(name))
+
+    text = io.StringIO()
+    with contextlib.redirect_stdout(text):
+        print(f"{name}\n  Régi: {old_url}\n  Új:   {new_url}")
+        print_build_table(df_regi, df_uj)
+        print_stage_averages(df_regi, df_uj, all_stages)
+        if resamples:
+            from stage_stats import print_stage_differences, stage_differences
+
+            print_stage_differences(stage_differences(df_regi, df_uj, all_stages, resamples=resamples))
+    with open(base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(text.getvalue())
+    export_comparison_csv(df_regi, df_uj, all_stages, base + '.csv')
+    if charts:
+        with contextlib.redirect_stdout(io.StringIO()):
+            plot_comparison(df_regi, df_uj, all_stages, BATCH_TITLE.format(name=name), output=base + '.png')
+    return name, summary_row(name, df_regi, df_uj), time.perf_counter() - start
+
+
+def batch_report(pairs, store, output_dir, last_n=None, folder_map=None, workers=None, resamples=0,
+                 charts=True):
+    # Job páronként egy feladat a process poolban; a buildeket a workerek a store-ból olvassák,
+    # így a riportok a magok számával skálázódnak, hálózati forgalom nélkül
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or BATCH_WORKERS or os.cpu_count() or 1
+    summary = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(pairs), 1)), initializer=_init_worker,
+                             initargs=(store.path,)) as pool:
+        futures = [pool.submit(render_pair, old_url, new_url, relative_job_path(old_url, folder_map),
+                               output_dir, last_n, resamples, charts)
+                   for old_url, new_url in pairs]
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                name, row, elapsed = future.result()
+            except Exception as e:
+                print(f"  HIBA a riport készítésekor: {e}")
+                continue
+            if row is None:
+                print(f"  [{done}/{len(futures)}] {name}: nincs tárolt build")
+                continue
+            summary.append(row)
+            print(f"  [{done}/{len(futures)}] {name} ({elapsed:.1f} s)")
+    print(f"✓ {len(summary)} riport {time.perf_counter() - start:.1f} s alatt, {workers} folyamattal")
+    return write_summary(summary, os.path.join(output_dir, 'batch_summary.csv'))
+
+
+def read_pairs_file(filename):
+    # Soronként egy "régi_url új_url" pár (szóközzel, tabbal vagy ';'-vel elválasztva), # megjegyzés
+    pairs = []
+    with open(filename, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].replace(';', ' ').strip()
+            if line:
+                old_url, new_url = line.split()
+                pairs.append((old_url.rstrip('/'), new_url.rstrip('/')))
+    return pairs
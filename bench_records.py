@@ -0,0 +1,65 @@
+import argparse
+import gc
+import time
+import tracemalloc
+
+import pandas as pd
+
+from bench_stage_matrix import synthetic_builds
+from jenkins_fetch import process_build_data
+from stage_matrix import BuildRecords, matrix_to_frame
+
+
+def measure(func, *args):
+    # A visszaadott objektum által megtartott memória és a csúcs a felépítés közben
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+
+def dict_rows(builds):
+    return [process_build_data(build, "Job") for build in builds]
+
+
+def dict_rows_frame(builds):
+    # A korábbi út: soronkénti dictek, DataFrame, fillna, exporthoz .copy()
+    rows = dict_rows(builds)
+    df = pd.DataFrame(rows).fillna(0)
+    return rows, df, df.copy()
+
+
+def records(builds):
+    return BuildRecords().extend(builds)
+
+
+def records_frame(builds):
+    recs = records(builds)
+    return recs, matrix_to_frame(recs.to_matrix(), "Job", with_time=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memóriaigény: soronkénti dictek vs. kompakt build rekordok")
+    parser.add_argument('--builds', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--stages', type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'Buildek':>8} {'Út':<26} {'Megtartott (MB)':>16} {'Csúcs (MB)':>11} {'B/build':>9} {'Idő (s)':>8}")
+    print("-" * 84)
+    for n_builds in args.builds:
+        builds = synthetic_builds(n_builds, args.stages)
+        for name, func in (('dict sorok', dict_rows), ('BuildRecords', records),
+                           ('dict sorok + DataFrame', dict_rows_frame), ('BuildRecords + DataFrame', records_frame)):
+            result, current, peak, elapsed = measure(func, builds)
+            print(f"{n_builds:>8} {name:<26} {current / 2**20:>16.1f} {peak / 2**20:>11.1f} "
+                  f"{current / n_builds:>9.0f} {elapsed:>8.3f}")
+            del result
+        print()
+
+
+if __name__ == "__main__":
+    main()
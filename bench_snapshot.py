@@ -0,0 +1,54 @@
+import argparse
+import os
+import tempfile
+import time
+
+from bench_stage_matrix import synthetic_builds
+from build_store import BuildStore
+from matrix_snapshot import load_matrix, snapshot_path
+from stage_matrix import matrix_to_frame
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tábla betöltés: store újraolvasás vs. CSV vs. memmap pillanatkép")
+    parser.add_argument('--builds', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--stages', type=int, default=40)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    print(f"{'Buildek':>8} {'Út':<30} {'Idő (s)':>9}")
+    print("-" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_builds in args.builds:
+            store = BuildStore(os.path.join(tmp, f"store_{n_builds}.sqlite"))
+            store.append('bench', 'job', synthetic_builds(n_builds, args.stages))
+            csv_path = os.path.join(tmp, f"export_{n_builds}.csv")
+            matrix_to_frame(store.load_records('bench', 'job').to_matrix(), "Job").to_csv(
+                csv_path, sep=';', decimal=',', index=False)
+
+            results = [
+                ('store újraolvasás', timed(lambda: matrix_to_frame(
+                    store.load_records('bench', 'job').to_matrix(), "Job"))[1]),
+                ('CSV (; és ,)', timed(pd.read_csv, csv_path, sep=';', decimal=',')[1]),
+                ('pillanatkép írása', timed(load_matrix, store, 'bench', 'job', write=True)[1]),
+                ('pillanatkép leképezése', timed(lambda: matrix_to_frame(
+                    load_matrix(store, 'bench', 'job'), "Job"))[1]),
+                ('pillanatkép, utolsó 100', timed(lambda: matrix_to_frame(
+                    load_matrix(store, 'bench', 'job', last_n=100), "Job"))[1]),
+            ]
+            for name, elapsed in results:
+                print(f"{n_builds:>8} {name:<30} {elapsed:>9.3f}")
+            size = os.path.getsize(snapshot_path(store.path, 'bench', 'job'))
+            print(f"{'':>8} pillanatkép mérete: {size / 2**20:.1f} MB\n")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
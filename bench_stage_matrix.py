@@ -0,0 +1,91 @@
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from stage_matrix import align_stage_frames, build_stage_matrix, matrix_to_frame
+
+
+def synthetic_builds(n_builds, n_stages, seed=0):
+    # Párhuzamos ágak: buildenként a stage-eknek csak egy része fut le
+    rng = random.Random(seed)
+    names = [f"Branch {i:03d}" for i in range(n_stages)]
+    builds = []
+    for build_id in range(n_builds, 0, -1):
+        stages = [{'name': name, 'durationMillis': rng.randint(0, 60000)}
+                  for name in rng.sample(names, k=max(1, n_stages * 2 // 3))]
+        total = sum(s['durationMillis'] for s in stages) + rng.randint(-5000, 20000)
+        builds.append({'id': str(build_id), 'durationMillis': total,
+                       'startTimeMillis': 1700000000000 + build_id * 60000, 'stages': stages})
+    return builds
+
+
+def legacy_path(builds_regi, builds_uj):
+    # A korábbi scriptek útja: soronkénti dict, fillna, .apply és oszloponkénti pótlás
+    frames = []
+    for builds in (builds_regi, builds_uj):
+        data_list = []
+        for build in builds:
+            row = {'_BuildID': build.get('id', 'N/A'), '_Total': build.get('durationMillis', 0) / 1000,
+                   '_Job': 'Job'}
+            for stage in build.get('stages', []):
+                row[stage['name']] = stage['durationMillis'] / 1000
+            data_list.append(row)
+        df = pd.DataFrame(data_list)
+        df = df.iloc[::-1].reset_index(drop=True).fillna(0)
+        frames.append(df)
+    df_regi, df_uj = frames
+
+    all_stages_set = set([c for c in df_regi.columns if not c.startswith('_')] +
+                         [c for c in df_uj.columns if not c.startswith('_')])
+    sorted_stages = sorted(all_stages_set)
+    df_regi['_StageSum'] = df_regi[[s for s in sorted_stages if s in df_regi.columns]].sum(axis=1)
+    df_uj['_StageSum'] = df_uj[[s for s in sorted_stages if s in df_uj.columns]].sum(axis=1)
+    df_regi['Wait/Other'] = (df_regi['_Total'] - df_regi['_StageSum']).apply(lambda x: max(0, x))
+    df_uj['Wait/Other'] = (df_uj['_Total'] - df_uj['_StageSum']).apply(lambda x: max(0, x))
+    sorted_stages.insert(0, 'Wait/Other')
+    for stage in sorted_stages:
+        if stage not in df_regi.columns:
+            df_regi[stage] = 0
+        if stage not in df_uj.columns:
+            df_uj[stage] = 0
+    return df_regi, df_uj
+
+
+def matrix_path(builds_regi, builds_uj):
+    stage_index = {}
+    df_regi = matrix_to_frame(build_stage_matrix(builds_regi[::-1], stage_index), 'Job')
+    df_uj = matrix_to_frame(build_stage_matrix(builds_uj[::-1], stage_index), 'Job')
+    (df_regi, df_uj), _ = align_stage_frames([df_regi, df_uj], [])
+    return df_regi, df_uj
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage mátrix építés: régi vs. vektorizált út")
+    parser.add_argument('--builds', type=int, nargs='+', default=[500, 5000, 20000])
+    parser.add_argument('--stages', type=int, nargs='+', default=[10, 100, 300])
+    args = parser.parse_args()
+
+    print(f"{'Buildek':>8} {'Stage-ek':>9} {'Régi (s)':>10} {'Mátrix (s)':>11} {'Gyorsulás':>10}")
+    print("-" * 52)
+    for n_stages in args.stages:
+        for n_builds in args.builds:
+            builds_regi = synthetic_builds(n_builds, n_stages, seed=1)
+            builds_uj = synthetic_builds(n_builds, n_stages, seed=2)
+            t_legacy, (legacy_regi, _) = timed(legacy_path, builds_regi, builds_uj)
+            t_matrix, (matrix_regi, _) = timed(matrix_path, builds_regi, builds_uj)
+            assert np.allclose(legacy_regi['Wait/Other'], matrix_regi['Wait/Other'], atol=1e-2)
+            print(f"{n_builds:>8} {n_stages:>9} {t_legacy:>10.3f} {t_matrix:>11.3f} "
+                  f"{t_legacy / t_matrix:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
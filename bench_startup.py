@@ -0,0 +1,57 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# A fetch útnak ennyi idő alatt el kell indulnia (interpreter indulással együtt)
+FETCH_STARTUP_BUDGET_MS = 400
+HEAVY_MODULES = ('pandas', 'matplotlib', 'numpy')
+
+_IMPORT_CHECK = (
+    "import sys, jenkins_reports, harvester, build_store, jenkins_fetch; "
+    "print(','.join(m for m in {heavy!r} if m in sys.modules))"
+)
+
+
+def time_command(cmd, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI indulási idő mérése")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=FETCH_STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    loaded = subprocess.run([sys.executable, '-c', _IMPORT_CHECK.format(heavy=HEAVY_MODULES)],
+                            check=True, capture_output=True, text=True).stdout.strip()
+
+    results = {
+        'python (üres)': time_command([sys.executable, '-c', 'pass'], args.repeat),
+        'fetch --help': time_command([sys.executable, 'jenkins_reports.py', 'fetch', '--help'], args.repeat),
+        'pandas + matplotlib import': time_command(
+            [sys.executable, '-c', 'import pandas, matplotlib.pyplot'], args.repeat),
+    }
+    for name, ms in results.items():
+        print(f"{name:<28} {ms:>8.1f} ms")
+
+    ok = True
+    if loaded:
+        print(f"HIBA: a fetch út betöltötte: {loaded}")
+        ok = False
+    if results['fetch --help'] > args.budget_ms:
+        print(f"HIBA: a fetch út indulása túllépi a {args.budget_ms:.0f} ms-os keretet")
+        ok = False
+    if ok:
+        print(f"✓ A fetch út a {args.budget_ms:.0f} ms-os kereten belül indul, nehéz könyvtárak nélkül")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# A benchmark mindig hálózatról mér, a cache és a helyi store nem torzíthat
+os.environ['JENKINS_CACHE'] = '0'
+
+import matplotlib
+matplotlib.use('Agg')
+
+import pandas as pd
+
+from fake_jenkins import FakeJenkinsConfig, start_server
+from jenkins_fetch import MAX_WORKERS_PER_CONTROLLER, get_session, process_build_data
+from report import export_comparison_csv, plot_comparison, prepare_comparison, print_build_table, print_stage_averages
+from stage_matrix import build_stage_matrix, matrix_to_frame
+from wfapi_stream import iter_json_array
+
+JOB_PATH = "/view/%20%20test-environments/job/test-environments/job/abomination-core/job/build-image"
+SCRIPTS = ['read_build_info.py', 'compare_abomination.py', 'compare_specific_builds.py']
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.samples = {}
+
+    @contextlib.contextmanager
+    def phase(self, scenario, name):
+        start = time.perf_counter()
+        yield
+        self.samples.setdefault((scenario, name), []).append(time.perf_counter() - start)
+
+
+def comparison_phases(timer, scenario, df_regi, df_uj, workdir):
+    with timer.phase(scenario, 'comparison'):
+        df_regi, df_uj, all_stages = prepare_comparison(df_regi, df_uj)
+        with contextlib.redirect_stdout(io.StringIO()):
+            print_build_table(df_regi, df_uj)
+            print_stage_averages(df_regi, df_uj, all_stages)
+    with timer.phase(scenario, 'render'):
+        with contextlib.redirect_stdout(io.StringIO()):
+            plot_comparison(df_regi, df_uj, all_stages, scenario, output=os.path.join(workdir, f"{scenario}.png"))
+    with timer.phase(scenario, 'export'):
+        export_comparison_csv(df_regi, df_uj, all_stages, os.path.join(workdir, f"{scenario}.csv"))
+
+
+def bench_runs(timer, servers, workdir):
+    # read_build_info.py / compare_abomination.py útja: egy wfapi/runs lista controllerenként
+    scenario = 'runs'
+    frames = []
+    for server, label in zip(servers, ("Régi Job", "Új Job")):
+        url = f"{server.url}{JOB_PATH}/wfapi/runs"
+        with timer.phase(scenario, 'fetch'):
+            body = get_session(url, None, None).get(url).content
+        with timer.phase(scenario, 'parse'):
+            builds = list(iter_json_array([body]))
+        with timer.phase(scenario, 'frame'):
+            frames.append(matrix_to_frame(build_stage_matrix(builds).reversed(), label, with_time=True))
+    comparison_phases(timer, scenario, frames[0], frames[1], workdir)
+
+
+def bench_pairs(timer, servers, workdir, n_pairs):
+    # compare_specific_builds.py útja: buildenként egy wfapi/describe hívás
+    scenario = 'pairs'
+    ids = list(range(1, n_pairs + 1))
+    frames = []
+    for server, label in zip(servers, ("Régi", "Új")):
+        base_url = f"{server.url}{JOB_PATH}"
+        session = get_session(base_url, None, None)
+        with timer.phase(scenario, 'fetch'):
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS_PER_CONTROLLER) as pool:
+                bodies = list(pool.map(lambda i: session.get(f"{base_url}/{i}/wfapi/describe").content, ids))
+        with timer.phase(scenario, 'parse'):
+            builds = [json.loads(body) for body in bodies]
+        with timer.phase(scenario, 'frame'):
+            frames.append(pd.DataFrame([process_build_data(b, f"{label} Job") for b in builds]).fillna(0))
+    comparison_phases(timer, scenario, frames[0], frames[1], workdir)
+
+
+def bench_scripts(timer, servers, workdir):
+    # A scriptek teljes futása alfolyamatként, a fake controllerek ellen
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ,
+               JENKINS_OLD_URL=servers[0].url, JENKINS_NEW_URL=servers[1].url,
+               JENKINS_CACHE='0', JENKINS_STORE=os.path.join(workdir, 'store.sqlite'),
+               MPLBACKEND='Agg', PYTHONPATH=root)
+    for script in SCRIPTS:
+        env['JENKINS_PLOT_OUTPUT'] = os.path.join(workdir, script.replace('.py', '.png'))
+        with timer.phase('scripts', script):
+            subprocess.run([sys.executable, os.path.join(root, script)], cwd=workdir, env=env,
+                           check=True, stdout=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Végponttól végpontig benchmark a fake Jenkins ellen")
+    # A compare_specific_builds.py a #823-#910 buildeket kéri, ezért legalább ennyi kell
+    parser.add_argument('--builds', type=int, default=1000)
+    parser.add_argument('--pairs', type=int, default=50, help="wfapi/describe párok száma")
+    parser.add_argument('--fanout', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-scripts', action='store_true', help="A scriptek alfolyamatos futtatása nélkül")
+    parser.add_argument('-o', '--output', default='bench_results.json')
+    args = parser.parse_args()
+
+    servers = [
+        start_server(FakeJenkinsConfig(args.builds, args.fanout, args.latency_ms,
+                                       runs_limit=args.builds, seed=seed))
+        for seed in (1, 2)
+    ]
+    timer = PhaseTimer()
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(args.repeat):
+            bench_runs(timer, servers, workdir)
+            bench_pairs(timer, servers, workdir, args.pairs)
+            if not args.skip_scripts:
+                bench_scripts(timer, servers, workdir)
+
+    results = []
+    print(f"{'Forgatókönyv':<10} {'Fázis':<28} {'Medián (s)':>11} {'Min (s)':>9}")
+    print("-" * 62)
+    for (scenario, phase), samples in timer.samples.items():
+        median = statistics.median(samples)
+        results.append({'scenario': scenario, 'phase': phase, 'median_s': median,
+                        'min_s': min(samples), 'samples_s': samples})
+        print(f"{scenario:<10} {phase:<28} {median:>11.3f} {min(samples):>9.3f}")
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': vars(args),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ Eredmények mentve: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import contextlib
+import io
+import os
+import time
+
+# A benchmark mindig hálózatról mér, a cache nem torzíthat
+os.environ['JENKINS_CACHE'] = '0'
+
+import jenkins_fetch
+from fake_jenkins import FakeJenkinsConfig, start_server
+from jenkins_fetch import (close_sessions, fetch_builds, fetch_runs, fetch_stage_steps, reset_transfer_stats,
+                           transfer_stats)
+
+JOB_PATH = "/job/test-environments/job/abomination-core/job/build-image"
+
+
+def run_scenarios(server, n_builds, n_describe, n_steps):
+    base_url = f"{server.url}{JOB_PATH}"
+    results = []
+    scenarios = (
+        ('wfapi/runs (teljes történet)', lambda: fetch_runs(f"{base_url}/wfapi/runs", None, None, since=0)),
+        (f'wfapi/describe x {n_describe}',
+         lambda: fetch_builds(base_url, range(n_builds, n_builds - n_describe, -1), None, None, "Job")),
+        (f'stage lépések ({n_steps} build)',
+         lambda: fetch_stage_steps(base_url, fetch_builds(base_url, range(1, n_steps + 1), None, None, "Job"),
+                                   None, None)),
+    )
+    for name, func in scenarios:
+        reset_transfer_stats()
+        server.reset_stats()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        elapsed = time.perf_counter() - start
+        stats = transfer_stats()[server.url]
+        results.append((name, stats, server.bytes_sent, elapsed))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Átvitt bájtok: tömörítés nélkül vs. gzip, a fake Jenkins ellen")
+    parser.add_argument('--builds', type=int, default=500)
+    parser.add_argument('--fanout', type=int, default=20)
+    parser.add_argument('--describe', type=int, default=100, help="Ennyi build egyenkénti lekérése")
+    parser.add_argument('--steps', type=int, default=10, help="Ennyi build stage lépéseinek lekérése")
+    parser.add_argument('--bandwidth-kbps', type=float, default=20000,
+                        help="A szimulált kapcsolat sávszélessége (0 = korlátlan)")
+    args = parser.parse_args()
+
+    config = FakeJenkinsConfig(builds=args.builds, fanout=args.fanout, bandwidth_kbps=args.bandwidth_kbps)
+    server = start_server(config)
+    print(f"{args.builds} build, {args.fanout} párhuzamos ág, {args.bandwidth_kbps:g} kbit/s\n")
+    print(f"{'Forgatókönyv':<32} {'Kódolás':<9} {'Kérés':>6} {'Átvitt (KB)':>12} {'JSON (KB)':>10} {'Idő (s)':>8}")
+    print("-" * 82)
+    by_encoding = {}
+    for encoding in ('identity', 'gzip'):
+        jenkins_fetch.ACCEPT_ENCODING = encoding
+        close_sessions()
+        by_encoding[encoding] = run_scenarios(server, args.builds, args.describe, args.steps)
+    for i in range(len(by_encoding['gzip'])):
+        for encoding in ('identity', 'gzip'):
+            name, stats, sent, elapsed = by_encoding[encoding][i]
+            if stats['wire_bytes'] != sent:
+                print(f"  FIGYELEM: a kliens {stats['wire_bytes']} bájtot mért, a szerver {sent}-t küldött")
+            print(f"{name:<32} {encoding:<9} {stats['requests']:>6} {stats['wire_bytes'] / 1024:>12.1f} "
+                  f"{stats['body_bytes'] / 1024:>10.1f} {elapsed:>8.2f}")
+        plain = by_encoding['identity'][i]
+        packed = by_encoding['gzip'][i]
+        print(f"{'':<32} {'megtakarítás':<16} {1 - packed[1]['wire_bytes'] / plain[1]['wire_bytes']:>12.0%} "
+              f"{'':>10} {plain[3] / packed[3]:>7.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+CACHE_DIR = os.getenv("JENKINS_CACHE_DIR", ".jenkins_cache")
+CACHE_MAX_BYTES = int(float(os.getenv("JENKINS_CACHE_MAX_MB", "256")) * 1024 * 1024)
+# A wfapi/runs listázás változhat (új buildek), ezért azt csak rövid ideig tartjuk meg
+RUNS_TTL_SEC = float(os.getenv("JENKINS_RUNS_TTL", "300"))
+CACHE_ENABLED = os.getenv("JENKINS_CACHE", "1") != "0"
+# Takarításkor a korlát ennyi részéig törlünk, hogy a határon ne járjon minden írás teljes bejárással
+CACHE_LOW_WATERMARK = 0.9
+
+# Ezek a státuszok még változhatnak, nem kerülnek cache-be
+UNFINISHED_STATUSES = {'IN_PROGRESS', 'PAUSED_PENDING_INPUT', 'QUEUED', 'NOT_EXECUTED'}
+
+
+def is_finished(build):
+    return bool(build) and build.get('status') not in UNFINISHED_STATUSES
+
+
+class BuildCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def _path(self, controller, job_path, build_id):
+        key = f"{controller}|{job_path}|{build_id}".encode('utf-8')
+        digest = hashlib.sha1(key).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + '.json')
+
+    def _read(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # LRU: az utolsó használat ideje az mtime
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += os.path.getsize(path) - old_size
+        self._evict_if_needed()
+
+    def get(self, controller, job_path, build_id):
+        return self._read(self._path(controller, job_path, build_id))
+
+    def put(self, controller, job_path, build_id, build):
+        if not is_finished(build):
+            return False
+        self._write(self._path(controller, job_path, build_id), build)
+        return True
+
+    def get_runs(self, controller, job_path, ttl=RUNS_TTL_SEC):
+        # A listázásnak csak a build azonosítóit tároljuk, a buildek maguk külön bejegyzések
+        entry = self._read(self._path(controller, job_path, 'wfapi/runs'))
+        if not entry or 'build_ids' not in entry or time.time() - entry.get('fetched_at', 0) > ttl:
+            return None
+        return entry['build_ids']
+
+    def put_runs(self, controller, job_path, build_ids):
+        entry = {'fetched_at': time.time(), 'build_ids': list(build_ids)}
+        self._write(self._path(controller, job_path, 'wfapi/runs'), entry)
+        return True
+
+    def _scan(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _evict_if_needed(self):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            if self._total_bytes <= self.max_bytes:
+                return
+            files = sorted(self._scan())
+            total = sum(size for _, size, _ in files)
+            target = self.max_bytes * CACHE_LOW_WATERMARK
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total_bytes = total
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache():
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = BuildCache()
+    return _default_cache
@@ -0,0 +1,571 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+
+from build_cache import is_finished
+from profiler import profiled
+from stage_sketch import QuantileSketch
+
+STORE_PATH = os.getenv("JENKINS_STORE", ".jenkins_store.sqlite")
+SCHEMA_VERSION = 6
+# A build teljes időtartamának vázlata; a valódi stage_id-k 1-től indulnak
+TOTAL_STAGE_ID = 0
+
+# Buildenként egy sor, stage-enként egy sor; mindkettő a (controller, job, build_id)
+# kulcs szerint fizikailag rendezve (WITHOUT ROWID), így egy job utolsó N buildje
+# egyetlen index tartomány olvasás.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    controller TEXT NOT NULL,
+    job TEXT NOT NULL,
+    build_id INTEGER NOT NULL,
+    name TEXT,
+    status TEXT,
+    start_ms INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    PRIMARY KEY (controller, job, build_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS builds_by_start ON builds (controller, job, start_ms);
+CREATE TABLE IF NOT EXISTS stage_names (
+    stage_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS stages (
+    controller TEXT NOT NULL,
+    job TEXT NOT NULL,
+    build_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    stage_id INTEGER NOT NULL REFERENCES stage_names (stage_id),
+    status TEXT,
+    start_ms INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    PRIMARY KEY (controller, job, build_id, seq)
+) WITHOUT ROWID;
+-- Stage szerinti lekérdezésekhez (store_query nézetei); fedő index, a táblát nem kell olvasni
+CREATE INDEX IF NOT EXISTS stages_by_stage ON stages (stage_id, controller, job, start_ms, duration_ms);
+CREATE TABLE IF NOT EXISTS harvest_state (
+    controller TEXT NOT NULL,
+    job TEXT NOT NULL,
+    max_build_id INTEGER NOT NULL,
+    pending TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (controller, job)
+);
+CREATE TABLE IF NOT EXISTS revisions (
+    controller TEXT NOT NULL,
+    job TEXT NOT NULL,
+    build_id INTEGER NOT NULL,
+    revision TEXT NOT NULL,
+    PRIMARY KEY (controller, job, build_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stage_sketches (
+    controller TEXT NOT NULL,
+    job TEXT NOT NULL,
+    stage_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    total_ms INTEGER NOT NULL,
+    min_ms INTEGER,
+    max_ms INTEGER,
+    bins TEXT NOT NULL,
+    PRIMARY KEY (controller, job, stage_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS steps (
+    controller TEXT NOT NULL,
+    job TEXT NOT NULL,
+    build_id INTEGER NOT NULL,
+    stage_seq INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    status TEXT,
+    start_ms INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    PRIMARY KEY (controller, job, build_id, stage_seq, seq)
+) WITHOUT ROWID;
+"""
+
+# Lekérdezési nézetek a scriptek kimeneteinek megfelelően (store_query, bármely SQLite kliens).
+# Az idők másodpercben, a hét a build indulásának hétfői napja helyi időben. Sémaváltáskor
+# újra létrejönnek.
+_VIEWS = """
+DROP VIEW IF EXISTS build_totals;
+DROP VIEW IF EXISTS stage_durations;
+DROP VIEW IF EXISTS stage_averages;
+CREATE VIEW build_totals AS
+SELECT controller, job, build_id, status, start_ms,
+       datetime(start_ms / 1000, 'unixepoch', 'localtime') AS start_time,
+       date(start_ms / 1000, 'unixepoch', 'localtime', 'weekday 0', '-6 days') AS week,
+       duration_ms / 1000.0 AS total_s,
+       stage_ms / 1000.0 AS stage_sum_s,
+       max(duration_ms - stage_ms, 0) / 1000.0 AS wait_other_s,
+       stages
+FROM (SELECT b.*,
+             (SELECT coalesce(sum(s.duration_ms), 0) FROM stages s
+              WHERE s.controller = b.controller AND s.job = b.job AND s.build_id = b.build_id) AS stage_ms,
+             (SELECT count(*) FROM stages s
+              WHERE s.controller = b.controller AND s.job = b.job AND s.build_id = b.build_id) AS stages
+      FROM builds b);
+CREATE VIEW stage_durations AS
+SELECT s.controller, s.job, s.build_id, s.seq, n.name AS stage, s.status, s.start_ms,
+       datetime(s.start_ms / 1000, 'unixepoch', 'localtime') AS start_time,
+       date(s.start_ms / 1000, 'unixepoch', 'localtime', 'weekday 0', '-6 days') AS week,
+       s.duration_ms / 1000.0 AS duration_s
+FROM stages s
+JOIN stage_names n ON n.stage_id = s.stage_id;
+CREATE VIEW stage_averages AS
+SELECT s.controller, s.job, n.name AS stage,
+       (SELECT count(*) FROM builds b WHERE b.controller = s.controller AND b.job = s.job) AS builds,
+       count(*) AS runs,
+       sum(s.duration_ms) / 1000.0
+           / (SELECT count(*) FROM builds b WHERE b.controller = s.controller AND b.job = s.job) AS avg_s,
+       avg(s.duration_ms) / 1000.0 AS avg_run_s,
+       max(s.duration_ms) / 1000.0 AS max_s
+FROM stages s
+JOIN stage_names n ON n.stage_id = s.stage_id
+GROUP BY s.controller, s.job, s.stage_id
+UNION ALL
+SELECT controller, job, 'Wait/Other', count(*), count(*), avg(wait_other_s), avg(wait_other_s), max(wait_other_s)
+FROM build_totals
+GROUP BY controller, job;
+"""
+
+
+def trim_build(build):
+    # Csak azt tartjuk meg, amit a riportok használnak
+    return {
+        'id': build.get('id'),
+        'name': build.get('name'),
+        'status': build.get('status'),
+        'startTimeMillis': build.get('startTimeMillis', 0),
+        'durationMillis': build.get('durationMillis', 0),
+        'stages': [
+            {
+                'name': stage['name'],
+                'status': stage.get('status'),
+                'startTimeMillis': stage.get('startTimeMillis', 0),
+                'durationMillis': stage.get('durationMillis', 0),
+            }
+            for stage in build.get('stages', [])
+        ],
+    }
+
+
+class BuildStore:
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+        if version < 4:
+            self._rebuild_sketches()
+        if version != SCHEMA_VERSION:
+            self._conn.executescript(_VIEWS)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._stage_ids = dict(
+            (name, stage_id) for stage_id, name in self._conn.execute("SELECT stage_id, name FROM stage_names"))
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(builds)")]
+        if version >= SCHEMA_VERSION or 'payload' not in columns:
+            return
+        # Az 1-es séma JSON payloadként tárolta a buildeket
+        legacy = self._conn.execute("SELECT controller, job, payload FROM builds").fetchall()
+        self._conn.execute("DROP TABLE builds")
+        self._conn.executescript(_SCHEMA)
+        self._stage_ids = {}
+        for controller, job, payload in legacy:
+            self.append(controller, job, [json.loads(payload)])
+
+    def _rebuild_sketches(self):
+        # A 4-es séma előtt tárolt buildek vázlatai egyszeri teljes olvasással
+        sketches = {}
+        for controller, job, duration_ms in self._conn.execute("SELECT controller, job, duration_ms FROM builds"):
+            sketches.setdefault((controller, job, TOTAL_STAGE_ID), QuantileSketch()).add(duration_ms)
+        for controller, job, stage_id, duration_ms in self._conn.execute(
+                "SELECT controller, job, stage_id, duration_ms FROM stages"):
+            sketches.setdefault((controller, job, stage_id), QuantileSketch()).add(duration_ms)
+        with self._conn:
+            self._conn.execute("DELETE FROM stage_sketches")
+            self._save_sketches(sketches)
+
+    def _load_sketches(self, controller, job):
+        rows = self._conn.execute(
+            "SELECT stage_id, count, total_ms, min_ms, max_ms, bins FROM stage_sketches "
+            "WHERE controller = ? AND job = ?", (controller, job)).fetchall()
+        return {(controller, job, stage_id): QuantileSketch.from_json(bins, count, total, min_ms, max_ms)
+                for stage_id, count, total, min_ms, max_ms, bins in rows}
+
+    def _save_sketches(self, sketches):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO stage_sketches "
+            "(controller, job, stage_id, count, total_ms, min_ms, max_ms, bins) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(controller, job, stage_id, sketch.count, sketch.total, sketch.min, sketch.max, sketch.to_json())
+             for (controller, job, stage_id), sketch in sketches.items()])
+
+    def close(self):
+        self._conn.close()
+
+    def _stage_id(self, name):
+        # Egy másik példány / folyamat közben felvehette ugyanezt a nevet
+        stage_id = self._stage_ids.get(name)
+        if stage_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO stage_names (name) VALUES (?)", (name,))
+            stage_id = self._conn.execute("SELECT stage_id FROM stage_names WHERE name = ?", (name,)).fetchone()[0]
+            self._stage_ids[name] = stage_id
+        return stage_id
+
+    def _stage_names(self, stage_ids):
+        # stage_id -> név (a hívó tartja a zárat); ha egy id-t egy másik példány vett fel a
+        # betöltésünk óta, a stage_names táblát újraolvassuk
+        names = {stage_id: name for name, stage_id in self._stage_ids.items()}
+        if not names.keys() >= set(stage_ids):
+            self._stage_ids = dict(
+                (name, stage_id) for stage_id, name in self._conn.execute("SELECT stage_id, name FROM stage_names"))
+            names = {stage_id: name for name, stage_id in self._stage_ids.items()}
+        return names
+
+    def known_ids(self, controller, job):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT build_id FROM builds WHERE controller = ? AND job = ?",
+                (controller, job)).fetchall()
+        return {row[0] for row in rows}
+
+    def get_state(self, controller, job):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT max_build_id, pending FROM harvest_state WHERE controller = ? AND job = ?",
+                (controller, job)).fetchone()
+        if row is None:
+            return None
+        return {'max_build_id': row[0], 'pending': json.loads(row[1])}
+
+    def set_state(self, controller, job, max_build_id, pending):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO harvest_state (controller, job, max_build_id, pending) "
+                "VALUES (?, ?, ?, ?)",
+                (controller, job, max_build_id, json.dumps(sorted(pending))))
+
+    def set_revisions(self, controller, job, revisions):
+        # build_id -> SCM revízió (commit SHA), a párosításhoz
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO revisions (controller, job, build_id, revision) VALUES (?, ?, ?, ?)",
+                [(controller, job, build_id, revision) for build_id, revision in revisions.items()])
+
+    def get_revisions(self, controller, job):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT build_id, revision FROM revisions WHERE controller = ? AND job = ?",
+                (controller, job)).fetchall()
+        return dict(rows)
+
+    @profiled('store.append')
+    def append(self, controller, job, builds):
+        # Append-only: egy már tárolt build nem íródik felül, ezért futó buildet (mint a cache)
+        # nem fogadunk el, a részleges időivel soha nem frissülne. Az új buildek a job stage
+        # vázlataiba is bekerülnek, így a percentilisekhez nem kell a teljes történetet olvasni.
+        builds = [build for build in builds if is_finished(build)]
+        added = 0
+        with self._lock, self._conn:
+            sketches = None
+            touched = set()
+            for build in builds:
+                build = trim_build(build)
+                build_id = int(build['id'])
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO builds "
+                    "(controller, job, build_id, name, status, start_ms, duration_ms) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (controller, job, build_id, build['name'], build['status'],
+                     build['startTimeMillis'], build['durationMillis']))
+                if cur.rowcount == 0:
+                    continue
+                added += 1
+                rows = [(controller, job, build_id, seq, self._stage_id(stage['name']), stage['status'],
+                         stage['startTimeMillis'], stage['durationMillis'])
+                        for seq, stage in enumerate(build['stages'])]
+                self._conn.executemany(
+                    "INSERT INTO stages "
+                    "(controller, job, build_id, seq, stage_id, status, start_ms, duration_ms) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+                if sketches is None:
+                    sketches = self._load_sketches(controller, job)
+                durations = [(TOTAL_STAGE_ID, build['durationMillis'])]
+                durations.extend((row[4], row[7]) for row in rows)
+                for stage_id, duration_ms in durations:
+                    key = (controller, job, stage_id)
+                    sketch = sketches.get(key)
+                    if sketch is None:
+                        sketch = sketches[key] = QuantileSketch()
+                    sketch.add(duration_ms)
+                    touched.add(key)
+            if touched:
+                self._save_sketches({key: sketches[key] for key in touched})
+        return added
+
+    def stage_sketches(self, controller, job):
+        # Stage név -> QuantileSketch; a build teljes időtartama '_Total' néven
+        with self._lock:
+            sketches = self._load_sketches(controller, job)
+            names = self._stage_names(stage_id for (_, _, stage_id) in sketches if stage_id != TOTAL_STAGE_ID)
+        names[TOTAL_STAGE_ID] = '_Total'
+        return {names[stage_id]: sketch for (_, _, stage_id), sketch in sketches.items()}
+
+    def append_steps(self, controller, job, steps):
+        # steps: {build_id: {stage sorszám: [wfapi stageFlowNodes]}}, a stages tábla seq-jéhez igazítva
+        rows = [(controller, job, build_id, stage_seq, seq, step.get('name', ''),
+                 step.get('parameterDescription'), step.get('status'),
+                 step.get('startTimeMillis', 0), step.get('durationMillis', 0))
+                for build_id, stages in steps.items()
+                for stage_seq, stage_steps in stages.items()
+                for seq, step in enumerate(stage_steps)]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO steps "
+                "(controller, job, build_id, stage_seq, seq, name, description, status, start_ms, duration_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def load_steps(self, controller, job, last_n=None, stage=None, build_id=None):
+        # Lépésenkénti hosszú tábla: _BuildID, Stage, StepSeq, Step, Description, Duration (s)
+        import pandas as pd
+
+        where = "st.controller = ? AND st.job = ?"
+        params = [controller, job]
+        if build_id is not None:
+            where += " AND st.build_id = ?"
+            params.append(build_id)
+        elif last_n is not None:
+            where += (" AND st.build_id IN (SELECT build_id FROM builds WHERE controller = ? AND job = ? "
+                      "ORDER BY build_id DESC LIMIT ?)")
+            params += [controller, job, last_n]
+        if stage is not None:
+            where += " AND n.name = ?"
+            params.append(stage)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT st.build_id, n.name, st.seq, st.name, st.description, st.duration_ms "
+                "FROM steps st "
+                "JOIN stages sg ON sg.controller = st.controller AND sg.job = st.job "
+                "AND sg.build_id = st.build_id AND sg.seq = st.stage_seq "
+                "JOIN stage_names n ON n.stage_id = sg.stage_id "
+                f"WHERE {where} ORDER BY st.build_id, st.stage_seq, st.seq", params).fetchall()
+        frame = pd.DataFrame(rows, columns=['_BuildID', 'Stage', 'StepSeq', 'Step', 'Description', 'Duration'])
+        frame['Duration'] = frame['Duration'] / 1000
+        return frame
+
+    def load_builds(self, controller, job, last_n=None, since_ms=None, until_ms=None):
+        # wfapi formátumú buildek, build szám szerint növekvő sorrendben
+        where = "controller = ? AND job = ?"
+        params = [controller, job]
+        if since_ms is not None:
+            where += " AND start_ms >= ?"
+            params.append(since_ms)
+        if until_ms is not None:
+            where += " AND start_ms < ?"
+            params.append(until_ms)
+        limit = ""
+        if last_n is not None:
+            limit = " LIMIT ?"
+            params.append(last_n)
+        with self._lock:
+            build_rows = self._conn.execute(
+                f"SELECT build_id, name, status, start_ms, duration_ms FROM builds "
+                f"WHERE {where} ORDER BY build_id DESC{limit}", params).fetchall()
+            if not build_rows:
+                return []
+            stage_rows = self._conn.execute(
+                "SELECT build_id, stage_id, status, start_ms, duration_ms FROM stages "
+                "WHERE controller = ? AND job = ? AND build_id BETWEEN ? AND ? ORDER BY build_id, seq",
+                (controller, job, build_rows[-1][0], build_rows[0][0])).fetchall()
+            names = self._stage_names({row[1] for row in stage_rows})
+
+        builds = {}
+        for build_id, name, status, start_ms, duration_ms in reversed(build_rows):
+            builds[build_id] = {
+                'id': str(build_id), 'name': name, 'status': status,
+                'startTimeMillis': start_ms, 'durationMillis': duration_ms, 'stages': [],
+            }
+        for build_id, stage_id, status, start_ms, duration_ms in stage_rows:
+            build = builds.get(build_id)
+            if build is not None:
+                build['stages'].append({
+                    'name': names[stage_id], 'status': status,
+                    'startTimeMillis': start_ms, 'durationMillis': duration_ms,
+                })
+        return list(builds.values())
+
+    def stage_names(self, controller, job):
+        # A job stage nevei első előfordulás szerint
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT n.name FROM stages s JOIN stage_names n ON n.stage_id = s.stage_id "
+                "WHERE s.controller = ? AND s.job = ? GROUP BY s.stage_id ORDER BY MIN(s.build_id), MIN(s.seq)",
+                (controller, job)).fetchall()
+        return [row[0] for row in rows]
+
+    def fingerprint(self, controller, job, upto_build_id=0):
+        # (buildek száma, legnagyobb build szám, buildek száma upto_build_id-ig); a store
+        # append-only, így ebből eldől, hogy egy korábbi pillanatkép érvényes-e
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT count(*), coalesce(max(build_id), 0), coalesce(sum(build_id <= ?), 0) FROM builds "
+                "WHERE controller = ? AND job = ?", (upto_build_id, controller, job)).fetchone()
+        return tuple(row)
+
+    def load_records(self, controller, job, last_n=None, table=None, after_build_id=None):
+        # Kompakt, tömb alapú buildek közvetlenül a táblákból, wfapi dictek nélkül
+        where = "controller = ? AND job = ?"
+        params = [controller, job]
+        if after_build_id is not None:
+            where += " AND build_id > ?"
+            params.append(after_build_id)
+        limit = ""
+        if last_n is not None:
+            limit = " LIMIT ?"
+            params.append(last_n)
+        with self._lock:
+            build_rows = self._conn.execute(
+                f"SELECT build_id, start_ms, duration_ms FROM builds WHERE {where} "
+                f"ORDER BY build_id DESC{limit}", params).fetchall()
+        return self._fill_records(controller, job, build_rows[::-1], table)
+
+    def iter_records(self, controller, job, chunk_builds, table=None, last_n=None):
+        # A job buildjei növekvő sorrendben, chunk_builds méretű BuildRecords darabokban.
+        # Közös table esetén minden darab ugyanazt az oszlopkiosztást kapja.
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT build_id FROM builds WHERE controller = ? AND job = ? ORDER BY build_id",
+                (controller, job))]
+        if last_n is not None:
+            ids = ids[-last_n:] if last_n else []
+        for i in range(0, len(ids), chunk_builds):
+            chunk = ids[i:i + chunk_builds]
+            with self._lock:
+                build_rows = self._conn.execute(
+                    "SELECT build_id, start_ms, duration_ms FROM builds "
+                    "WHERE controller = ? AND job = ? AND build_id BETWEEN ? AND ? ORDER BY build_id",
+                    (controller, job, chunk[0], chunk[-1])).fetchall()
+            yield self._fill_records(controller, job, build_rows, table)
+
+    def _fill_records(self, controller, job, build_rows, table):
+        # build_rows: (build_id, start_ms, duration_ms) növekvő build szám szerint
+        from stage_matrix import BuildRecords
+
+        records = BuildRecords(table)
+        if not build_rows:
+            return records
+        with self._lock:
+            stage_rows = self._conn.execute(
+                "SELECT build_id, stage_id, duration_ms FROM stages "
+                "WHERE controller = ? AND job = ? AND build_id BETWEEN ? AND ? ORDER BY build_id, seq",
+                (controller, job, build_rows[0][0], build_rows[-1][0])).fetchall()
+            names = self._stage_names({row[1] for row in stage_rows})
+
+        intern = records.table.intern
+        local_ids = {}
+        stage_ids = records.stage_ids
+        durations = records.durations_ms
+        i = 0
+        for build_id, start_ms, duration_ms in build_rows:
+            while i < len(stage_rows) and stage_rows[i][0] == build_id:
+                stage_id = stage_rows[i][1]
+                local_id = local_ids.get(stage_id)
+                if local_id is None:
+                    local_id = local_ids[stage_id] = intern(names[stage_id])
+                stage_ids.append(local_id)
+                durations.append(stage_rows[i][2])
+                i += 1
+            records.build_ids.append(build_id)
+            records.start_ms.append(start_ms)
+            records.total_ms.append(duration_ms)
+            records.offsets.append(len(stage_ids))
+        return records
+
+    @profiled('store.load')
+    def load_frame(self, controller, job, job_label, last_n=None, readonly=False):
+        # Ugyanaz a táblázat, mint amit a fetch_job_data ad (meta oszlopok + float32 stage blokk),
+        # alapból írható másolat; readonly=True esetén a pillanatkép memmap nézete, írása ValueError
+        from stage_matrix import matrix_to_frame
+
+        matrix = self.load_matrix(controller, job, last_n=last_n)
+        if not readonly:
+            matrix = matrix.writable()
+        return matrix_to_frame(matrix, job_label, with_time=True)
+
+    def load_matrix(self, controller, job, last_n=None):
+        # A pillanatképből leképezve (JENKINS_SNAPSHOT=1), különben közvetlenül a táblákból; a
+        # pillanatképből jövő tömbök csak olvashatók
+        from matrix_snapshot import SNAPSHOT_ENABLED, load_matrix
+
+        if SNAPSHOT_ENABLED:
+            return load_matrix(self, controller, job, last_n=last_n)
+        return self.load_records(controller, job, last_n=last_n).to_matrix()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def default_store():
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = BuildStore()
+    return _default_store
+
+
+def record_builds(job_url, builds):
+    # A scriptek által lekért, lezárt buildek mentése a store-ba (a futókat az append kihagyja)
+    from jenkins_fetch import job_key
+
+    controller, job = job_key(job_url.split('/wfapi/')[0].rstrip('/'))
+    return default_store().append(controller, job, builds)
+
+
+def record_builds_iter(job_url, builds, batch_size=200):
+    # Mint a record_builds, de a buildeket változatlanul továbbadja, és kötegenként ír
+    batch = []
+    for build in builds:
+        batch.append(build)
+        if len(batch) >= batch_size:
+            record_builds(job_url, batch)
+            batch = []
+        yield build
+    if batch:
+        record_builds(job_url, batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build store exportálása (CSV, NDJSON, Parquet)")
+    parser.add_argument('job_url', help="Job URL (wfapi nélkül)")
+    parser.add_argument('--last', type=int, default=None, help="Csak az utolsó N build")
+    parser.add_argument('--label', default="Job", help="A _Job oszlop értéke")
+    parser.add_argument('-o', '--output', default="jenkins_store_export.csv",
+                        help="A kiterjesztés dönt: .csv, .csv.gz, .csv.zst, .ndjson(.gz/.zst), .parquet")
+    parser.add_argument('--plain-csv', action='store_true', help="',' elválasztó és '.' tizedesjel")
+    parser.add_argument('--chunk', type=int, default=None, help="Buildek száma darabonként")
+    args = parser.parse_args()
+
+    from export import EXPORT_CHUNK_BUILDS, export_job_history
+    from jenkins_fetch import job_key
+
+    controller, job = job_key(args.job_url.rstrip('/'))
+    rows = export_job_history(default_store(), controller, job, args.label, args.output,
+                              args.chunk or EXPORT_CHUNK_BUILDS, args.last, spreadsheet=not args.plain_csv)
+    if not rows:
+        print(f"HIBA: nincs tárolt build: {job}")
+        return
+    print(f"✓ {rows} build exportálva: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
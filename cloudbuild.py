@@ -0,0 +1,249 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+
+import numpy as np
+
+from profiler import profiled
+
+# Cloud Build rekordok helyi JSON exportokból (gcloud builds list/describe --format=json, a REST
+# API builds.list válasza vagy NDJSON), összekapcsolva a Jenkins buildekkel a build szám alapján.
+CLOUDBUILD_DIR = os.getenv("JENKINS_CLOUDBUILD_DIR", "cloudbuild_exports")
+# A Jenkins stage, amely a Cloud Build-et elindítja és megvárja
+CLOUDBUILD_STAGE = os.getenv("JENKINS_CLOUDBUILD_STAGE", "Build & Push (Google Cloud Build)")
+# Ezekben a substitution kulcsokban keressük a Jenkins build számot, sorrendben
+CLOUDBUILD_KEYS = [k.strip() for k in os.getenv(
+    "JENKINS_CLOUDBUILD_KEYS", "_BUILD_NUMBER,BUILD_NUMBER,_JENKINS_BUILD").split(',') if k.strip()]
+# Ha nincs substitution, a tagekből ezzel a mintával (az első csoport a build szám)
+CLOUDBUILD_TAG_PATTERN = os.getenv("JENKINS_CLOUDBUILD_TAG", r"^(?:jenkins|build)-(\d+)$")
+# A konzolban látható rövid Cloud Build azonosító hossza (pl. 62a29768)
+SHORT_ID = 8
+# A Cloud Build timing szakaszai, ha az export tartalmazza őket
+TIMING_PHASES = {'FETCHSOURCE': 'CB forrás (s)', 'BUILD': 'CB build (s)', 'PUSH': 'CB push (s)'}
+
+JENKINS_COL = 'Jenkins stage (s)'
+CLOUDBUILD_COL = 'Cloud Build (s)'
+OVERHEAD_COL = 'Jenkins többlet (s)'
+QUEUE_COL = 'CB várakozás (s)'
+
+_EXTENSIONS = ('.json', '.ndjson', '.jsonl', '.json.gz', '.ndjson.gz', '.jsonl.gz')
+_MAP_LINE = re.compile(r"#?(\d+)\W+(?:->\W*)?([0-9a-f]{8}[0-9a-f-]*)", re.IGNORECASE)
+
+
+def record_files(paths):
+    # Fájlok és könyvtárak (rekurzívan) vegyesen, név szerint rendezve
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for ext in _EXTENSIONS:
+                files.extend(glob.glob(os.path.join(path, '**', '*' + ext), recursive=True))
+        else:
+            files.append(path)
+    return sorted(set(files))
+
+
+def iter_cloudbuild_records(paths):
+    for filename in record_files(paths):
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(filename, 'rt', encoding='utf-8') as f:
+            if filename.rsplit('.gz', 1)[0].endswith(('.ndjson', '.jsonl')):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+                continue
+            data = json.load(f)
+        # gcloud builds list: lista, describe: egy objektum, REST API: {"builds": [...]}
+        if isinstance(data, dict):
+            data = data.get('builds', [data])
+        yield from data
+
+
+def read_build_map(filename):
+    # Kézi párosítás a régi buildekhez, soronként pl. "#908 -> 62a29768" vagy "908;62a29768".
+    # Eredmény: rövid Cloud Build azonosító -> Jenkins build szám
+    mapping = {}
+    with open(filename, encoding='utf-8') as f:
+        for line in f:
+            match = _MAP_LINE.search(line.split('//', 1)[0])
+            if match:
+                mapping[match.group(2)[:SHORT_ID].lower()] = match.group(1)
+    return mapping
+
+
+def jenkins_build_number(record, keys=None, tag_pattern=None):
+    substitutions = record.get('substitutions') or {}
+    for key in CLOUDBUILD_KEYS if keys is None else keys:
+        value = str(substitutions.get(key, '')).lstrip('#')
+        if value.isdigit():
+            return value
+    pattern = re.compile(tag_pattern or CLOUDBUILD_TAG_PATTERN)
+    for tag in record.get('tags') or []:
+        match = pattern.search(tag)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _seconds(end, start):
+    return ((end - start).dt.total_seconds()).to_numpy(dtype=np.float64)
+
+
+@profiled('cloudbuild.load')
+def load_cloudbuild_frame(paths, build_map=None, keys=None, tag_pattern=None, tag=None):
+    # Cloud Build rekordonként egy sor: _CloudBuildID, _BuildID (Jenkins build szám, ha ismert),
+    # _Status, _Created, futásidő, várakozás és a timing szakaszok másodpercben
+    import pandas as pd
+
+    pattern = re.compile(tag_pattern or CLOUDBUILD_TAG_PATTERN)
+    build_map = build_map or {}
+    columns = {name: [] for name in ('_CloudBuildID', '_BuildID', '_Status', 'createTime', 'startTime',
+                                     'finishTime')}
+    timing = {phase: ([], []) for phase in TIMING_PHASES}
+    for record in iter_cloudbuild_records(paths):
+        if tag is not None and tag not in (record.get('tags') or []):
+            continue
+        build_id = record.get('id', '')
+        number = jenkins_build_number(record, keys, pattern) or build_map.get(build_id[:SHORT_ID].lower())
+        columns['_CloudBuildID'].append(build_id)
+        columns['_BuildID'].append(number)
+        columns['_Status'].append(record.get('status'))
+        for name in ('createTime', 'startTime', 'finishTime'):
+            columns[name].append(record.get(name))
+        spans = record.get('timing') or {}
+        for phase, (starts, ends) in timing.items():
+            span = spans.get(phase) or {}
+            starts.append(span.get('startTime'))
+            ends.append(span.get('endTime'))
+
+    df = pd.DataFrame({'_CloudBuildID': columns['_CloudBuildID'], '_BuildID': columns['_BuildID'],
+                       '_Status': columns['_Status']})
+    times = {name: pd.to_datetime(pd.Series(columns[name], dtype=object), utc=True, format='ISO8601')
+             for name in ('createTime', 'startTime', 'finishTime')}
+    df['_Created'] = times['createTime']
+    df[CLOUDBUILD_COL] = _seconds(times['finishTime'], times['startTime'])
+    df[QUEUE_COL] = _seconds(times['startTime'], times['createTime'])
+    for phase, (starts, ends) in timing.items():
+        if any(s is not None for s in starts):
+            df[TIMING_PHASES[phase]] = _seconds(
+                pd.to_datetime(pd.Series(ends, dtype=object), utc=True, format='ISO8601'),
+                pd.to_datetime(pd.Series(starts, dtype=object), utc=True, format='ISO8601'))
+    # Átfedő exportokban ugyanaz a build többször is szerepelhet; a futó buildeknek nincs ideje
+    df = df.drop_duplicates('_CloudBuildID', keep='last')
+    return df[df[CLOUDBUILD_COL].notna()].reset_index(drop=True)
+
+
+@profiled('cloudbuild.join')
+def join_cloudbuild(df_jenkins, df_cloudbuild, stage=CLOUDBUILD_STAGE):
+    # Hash join a Jenkins build számon: a Cloud Build oldalt build számonként összegezzük (egy
+    # stage több buildet, pl. újrapróbálást is indíthat), majd minden Jenkins buildhez egy
+    # kereséssel párosítjuk. A többlet a stage ideje a Cloud Build futásidején felül.
+    # Eredmény: a sorozat, a párosítatlan Jenkins és a párosítatlan Cloud Build azonosítók
+    if stage not in df_jenkins.columns:
+        raise KeyError(f"Nincs ilyen stage a Jenkins buildekben: {stage}")
+    known = df_cloudbuild[df_cloudbuild['_BuildID'].notna()].sort_values('_Created', kind='stable')
+    value_cols = [c for c in known.columns if c.endswith('(s)')]
+    grouped = known.groupby('_BuildID', sort=False)
+    cloudbuild = grouped[value_cols].sum(min_count=1)
+    cloudbuild['_CloudBuildID'] = grouped['_CloudBuildID'].agg(lambda ids: ','.join(i[:SHORT_ID] for i in ids))
+    # Az állapot a legutóbb indított Cloud Build-é
+    cloudbuild['_Status'] = grouped['_Status'].last()
+    cloudbuild['_Count'] = grouped.size()
+
+    # A stage nélküli (0 s) buildekben nem futott Cloud Build, ezek nem kerülnek a sorozatba
+    jenkins = df_jenkins.loc[df_jenkins[stage] > 0, ['_BuildID', '_Total', stage]
+                             + (['_Time'] if '_Time' in df_jenkins.columns else [])]
+    jenkins = jenkins.rename(columns={stage: JENKINS_COL})
+    series = jenkins.merge(cloudbuild, left_on='_BuildID', right_index=True, how='inner', sort=False)
+    series[OVERHEAD_COL] = series[JENKINS_COL] - series[CLOUDBUILD_COL]
+    series = series.iloc[np.argsort(series['_BuildID'].astype(np.int64).to_numpy(), kind='stable')]
+
+    unmatched_jenkins = sorted(set(jenkins['_BuildID']) - set(cloudbuild.index), key=int)
+    unmatched_cloudbuild = df_cloudbuild.loc[~df_cloudbuild['_BuildID'].isin(series['_BuildID']),
+                                             '_CloudBuildID'].tolist()
+    return series.reset_index(drop=True), unmatched_jenkins, unmatched_cloudbuild
+
+
+def series_columns(series):
+    # Export oszlopsorrend; a _Time diagram felirat, nem kerül a fájlba
+    timing = [c for c in TIMING_PHASES.values() if c in series.columns]
+    return (['_BuildID', '_CloudBuildID', '_Status', '_Count', '_Total', JENKINS_COL, CLOUDBUILD_COL, OVERHEAD_COL,
+             QUEUE_COL] + timing)
+
+
+def print_cloudbuild_summary(series, unmatched_jenkins, unmatched_cloudbuild):
+    print(f"\n✓ {len(series)} Jenkins build párosítva Cloud Build-del, "
+          f"{len(unmatched_jenkins)} Jenkins és {len(unmatched_cloudbuild)} Cloud Build párosítatlan")
+    if series.empty:
+        return
+    print(f"\n{'':<22} {'Medián (s)':>11} {'p90 (s)':>9} {'Átlag (s)':>10}")
+    print("-" * 55)
+    for col in (JENKINS_COL, CLOUDBUILD_COL, OVERHEAD_COL, QUEUE_COL):
+        values = series[col].dropna()
+        if len(values):
+            print(f"{col:<22} {values.median():>11.1f} {values.quantile(0.9):>9.1f} {values.mean():>10.1f}")
+    share = series[OVERHEAD_COL].sum() / series[JENKINS_COL].sum() * 100
+    print(f"\nA stage idejének {share:.1f}%-a Jenkins oldali többlet")
+
+
+@profiled('plot')
+def plot_cloudbuild_series(series, title, events=None, output=None):
+    # events: build szám -> felirat, a függőleges vonal az adott build elé kerül
+    import matplotlib.pyplot as plt
+
+    from render import LABEL_THRESHOLD, PLOT_OUTPUT, draw_total_labels, save_or_show, set_build_xticks
+
+    x = np.arange(len(series))
+    jenkins = series[JENKINS_COL].to_numpy()
+    cloudbuild = series[CLOUDBUILD_COL].to_numpy()
+    marker = len(series) <= 200
+
+    fig, ax = plt.subplots(figsize=(10 if len(series) <= 20 else 16, 6))
+    ax.plot(x, jenkins, marker='o' if marker else None, linestyle='-', linewidth=2 if marker else 1,
+            label='Jenkins Build Time', color='#1f77b4')
+    ax.plot(x, cloudbuild, marker='s' if marker else None, linestyle='-', linewidth=2 if marker else 1,
+            label='Cloud Build Time', color='#ff7f0e')
+    ax.fill_between(x, cloudbuild, jenkins, color='#1f77b4', alpha=0.12, label='Jenkins többlet')
+    # Sok buildnél a görbék olvashatók, a pontonkénti feliratok már csak takarnának
+    if len(series) <= LABEL_THRESHOLD:
+        draw_total_labels(ax, x, jenkins, color='#1f77b4', fontsize=10)
+    for i in range(len(series) if len(series) <= LABEL_THRESHOLD else 0):
+        ax.annotate(f"{cloudbuild[i]:.0f}s", (x[i], cloudbuild[i]), textcoords="offset points", xytext=(0, -15),
+                    ha='center', color='#ff7f0e', fontweight='bold')
+
+    positions = {build_id: i for i, build_id in enumerate(series['_BuildID'])}
+    top = max(jenkins.max(), cloudbuild.max()) if len(series) else 0
+    for build_id, text in (events or {}).items():
+        if str(build_id) in positions:
+            line_pos = positions[str(build_id)] - 0.5
+            ax.axvline(x=line_pos, color='red', linestyle='--', linewidth=1.5)
+            ax.text(line_pos - 0.1, top * 0.9, text, color='red', rotation=0, fontweight='bold', ha='right')
+
+    set_build_xticks(ax, x, [f"#{b}" for b in series['_BuildID']], rotation=45 if len(series) > 8 else 0)
+    ax.set_xlabel('Build Sorszám', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Időtartam (másodperc)', fontsize=12, fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.grid(True, linestyle='--', alpha=0.5)
+    ax.legend()
+
+    plt.tight_layout()
+    save_or_show(fig, output or PLOT_OUTPUT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cloud Build exportok összesítése (párosítás nélkül)")
+    parser.add_argument('paths', nargs='*', default=[CLOUDBUILD_DIR], help="JSON/NDJSON fájlok vagy könyvtárak")
+    parser.add_argument('--map', default=None, help="Kézi build szám -> Cloud Build azonosító párosítás")
+    args = parser.parse_args()
+
+    df = load_cloudbuild_frame(args.paths, read_build_map(args.map) if args.map else None)
+    print(f"{len(df)} Cloud Build, ebből {df['_BuildID'].notna().sum()} Jenkins build számmal")
+    if not df.empty:
+        print(df.groupby('_Status')[CLOUDBUILD_COL].agg(['count', 'median', 'max']).to_string(
+            float_format=lambda v: f"{v:.1f}"))
+
+
+if __name__ == "__main__":
+    main()
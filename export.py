@@ -0,0 +1,159 @@
+import gzip
+import io
+import os
+
+import numpy as np
+
+from profiler import profiled
+
+# Alapértelmezett kimeneti formátum a scriptek exportjához: csv (';' / ','), csv.gz, csv.zst,
+# ndjson, ndjson.gz, ndjson.zst vagy parquet
+EXPORT_FORMAT = os.getenv("JENKINS_EXPORT_FORMAT", "csv")
+EXPORT_CHUNK_BUILDS = int(os.getenv("JENKINS_EXPORT_CHUNK", "5000"))
+META_COLUMNS = ['_Job', '_BuildID', '_Total', '_Time', 'Wait/Other']
+
+_FORMATS = ('parquet', 'ndjson', 'jsonl', 'csv')
+
+
+def detect_format(filename):
+    # (formátum, tömörítés) a fájl kiterjesztéséből, pl. out.csv.zst -> ('csv', 'zstd')
+    name = filename.lower()
+    compression = None
+    if name.endswith('.gz'):
+        compression, name = 'gzip', name[:-3]
+    elif name.endswith('.zst'):
+        compression, name = 'zstd', name[:-4]
+    for fmt in _FORMATS:
+        if name.endswith('.' + fmt):
+            return ('ndjson' if fmt == 'jsonl' else fmt), compression
+    raise ValueError(f"Ismeretlen export formátum: {filename}")
+
+
+def output_name(filename, fmt=None):
+    # jenkins_comparison_data.csv + 'parquet' -> jenkins_comparison_data.parquet
+    fmt = fmt or EXPORT_FORMAT
+    base = filename.rsplit('.csv', 1)[0] if filename.endswith('.csv') else filename
+    return f"{base}.{fmt}"
+
+
+def _open_text(filename, compression):
+    if compression == 'gzip':
+        return gzip.open(filename, 'wt', encoding='utf-8', newline='')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("A .zst exporthoz a 'zstandard' csomag szükséges (pip install zstandard)")
+        raw = open(filename, 'wb')
+        stream = zstandard.ZstdCompressor(level=6).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    return open(filename, 'w', encoding='utf-8', newline='')
+
+
+class CsvWriter:
+    # spreadsheet=True: az eredeti ';' elválasztó és ',' tizedesjel a táblázatkezelőkhöz
+    def __init__(self, filename, columns, compression=None, spreadsheet=True):
+        self.columns = columns
+        self.sep, self.decimal = (';', ',') if spreadsheet else (',', '.')
+        self._f = _open_text(filename, compression)
+        self._header = True
+
+    def write(self, frame):
+        frame[self.columns].to_csv(self._f, index=False, header=self._header, sep=self.sep, decimal=self.decimal)
+        self._header = False
+
+    def close(self):
+        self._f.close()
+
+
+class NdjsonWriter:
+    def __init__(self, filename, columns, compression=None):
+        self.columns = columns
+        self._f = _open_text(filename, compression)
+
+    def write(self, frame):
+        # Soronként egy JSON objektum; a pandas a blokkot egyben szerializálja
+        text = frame[self.columns].to_json(orient='records', lines=True, force_ascii=False)
+        if text:
+            self._f.write(text if text.endswith('\n') else text + '\n')
+
+    def close(self):
+        self._f.close()
+
+
+class ParquetWriter:
+    # Darabonként egy row group; a séma az első darabból jön, a többi ehhez igazodik
+    def __init__(self, filename, columns, compression=None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("A Parquet exporthoz a 'pyarrow' csomag szükséges (pip install pyarrow)")
+        self._pa = pa
+        self._pq = pq
+        self.filename = filename
+        self.columns = columns
+        self.compression = compression or 'zstd'
+        self._writer = None
+
+    def write(self, frame):
+        table = self._pa.Table.from_pandas(frame[self.columns], preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.filename, table.schema, compression=self.compression)
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_writer(filename, columns, spreadsheet=True):
+    fmt, compression = detect_format(filename)
+    if fmt == 'parquet':
+        return ParquetWriter(filename, columns, compression)
+    if fmt == 'ndjson':
+        return NdjsonWriter(filename, columns, compression)
+    return CsvWriter(filename, columns, compression, spreadsheet)
+
+
+@profiled('export')
+def write_frames(frames, filename, columns=None, spreadsheet=True):
+    # A táblák egymás után, darabonként kerülnek a fájlba, összefűzött DataFrame nélkül
+    writer = None
+    rows = 0
+    try:
+        for frame in frames:
+            if writer is None:
+                writer = open_writer(filename, columns or list(frame.columns), spreadsheet)
+            writer.write(frame)
+            rows += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def comparison_columns(df_regi, df_uj, all_stages):
+    stage_cols = [c for c in all_stages if c != 'Wait/Other']
+    return [c for c in META_COLUMNS + stage_cols if c in df_regi.columns and c in df_uj.columns]
+
+
+def iter_history_frames(store, controller, job, job_label, chunk_builds=EXPORT_CHUNK_BUILDS, last_n=None):
+    # Egy job teljes története EXPORT_CHUNK_BUILDS buildes darabokban, rögzített oszlopkészlettel
+    from stage_matrix import StageTable, matrix_to_frame
+
+    table = StageTable(store.stage_names(controller, job))
+    for records in store.iter_records(controller, job, chunk_builds, table=table, last_n=last_n):
+        matrix = records.to_matrix()
+        frame = matrix_to_frame(matrix, job_label, with_time=True)
+        frame['Wait/Other'] = np.maximum(matrix.totals - matrix.stage_sum(), 0)
+        yield frame
+
+
+def export_job_history(store, controller, job, job_label, filename, chunk_builds=EXPORT_CHUNK_BUILDS,
+                       last_n=None, spreadsheet=True):
+    columns = META_COLUMNS + [name for name in store.stage_names(controller, job) if name != 'Wait/Other']
+    frames = iter_history_frames(store, controller, job, job_label, chunk_builds, last_n)
+    return write_frames(frames, filename, columns, spreadsheet)
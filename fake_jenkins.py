@@ -0,0 +1,307 @@
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Helyi, szintetikus wfapi kiszolgáló benchmarkokhoz és offline fejlesztéshez
+
+BASE_STAGES = ['Init', 'Declarative: Checkout SCM', 'Git clone', 'Build', 'Test', 'Declarative: Post Actions']
+START_MS = 1765000000000
+FOLDER_CLASS = 'com.cloudbees.hudson.plugins.folder.Folder'
+PIPELINE_CLASS = 'org.jenkinsci.plugins.workflow.job.WorkflowJob'
+
+
+class FakeJenkinsConfig:
+    def __init__(self, builds=50, fanout=0, latency_ms=0, runs_limit=10, in_progress=0, seed=0,
+                 folders=(), jobs_per_folder=0, steps_per_stage=3, bandwidth_kbps=0):
+        self.builds = builds
+        self.fanout = fanout
+        self.latency_ms = latency_ms
+        self.runs_limit = runs_limit
+        self.in_progress = in_progress
+        self.seed = seed
+        self.folders = list(folders)
+        self.jobs_per_folder = jobs_per_folder
+        self.steps_per_stage = steps_per_stage
+        self.bandwidth_kbps = bandwidth_kbps
+
+
+def make_build(config, job, build_id):
+    rng = random.Random(zlib.crc32(f"{config.seed}|{job}|{build_id}".encode()))
+    names = BASE_STAGES + [f"Branch {i:03d}" for i in range(config.fanout)]
+    start = START_MS + build_id * 3_600_000 + rng.randint(0, 600_000)
+    status = 'IN_PROGRESS' if build_id > config.builds - config.in_progress else 'SUCCESS'
+
+    stages = []
+    t = start + rng.randint(500, 30_000)
+    for node_id, name in enumerate(names, start=6):
+        duration = rng.randint(0, 2_000) if name.startswith('Declarative') else rng.randint(500, 120_000)
+        stages.append({
+            '_links': {'self': {'href': f"{job}/{build_id}/execution/node/{node_id}/wfapi/describe"}},
+            'id': str(node_id),
+            'name': name,
+            'execNode': '',
+            'status': 'SUCCESS',
+            'startTimeMillis': t,
+            'durationMillis': duration,
+            'pauseDurationMillis': 0,
+        })
+        # A párhuzamos ágak egymással átfedésben futnak
+        if not name.startswith('Branch'):
+            t += duration
+    end = max(t, max((s['startTimeMillis'] + s['durationMillis'] for s in stages), default=t))
+    end += rng.randint(200, 5_000)
+    return {
+        '_links': {'self': {'href': f"{job}/{build_id}/wfapi/describe"}},
+        'id': str(build_id),
+        'name': f"#{build_id}",
+        'status': status,
+        'startTimeMillis': start,
+        'endTimeMillis': end,
+        'durationMillis': end - start,
+        'queueDurationMillis': rng.randint(0, 10_000),
+        'pauseDurationMillis': 0,
+        'stages': stages,
+    }
+
+
+def make_node(config, job, build_id, node_id):
+    # Egy stage wfapi/describe válasza: a stage adatai és a lépései (stageFlowNodes)
+    build = make_build(config, job, build_id)
+    stage = next((s for s in build['stages'] if s['id'] == str(node_id)), None)
+    if stage is None:
+        return None
+    rng = random.Random(zlib.crc32(f"{config.seed}|{job}|{build_id}|{node_id}".encode()))
+    n = config.steps_per_stage
+    weights = [rng.random() + 0.1 for _ in range(n)]
+    t = stage['startTimeMillis']
+    steps = []
+    for i, w in enumerate(weights):
+        duration = int(stage['durationMillis'] * w / sum(weights))
+        steps.append({
+            '_links': {'self': {'href': f"{job}/{build_id}/execution/node/{node_id * 100 + i}/wfapi/describe"}},
+            'id': str(node_id * 100 + i),
+            'name': 'Shell Script' if i % 2 == 0 else 'Print Message',
+            'execNode': '',
+            'status': stage['status'],
+            'parameterDescription': f"make step-{i}" if i % 2 == 0 else f"step {i} kész",
+            'startTimeMillis': t,
+            'durationMillis': duration,
+            'pauseDurationMillis': 0,
+            'parentNodes': [str(node_id)],
+        })
+        t += duration
+    return dict(stage, stageFlowNodes=steps)
+
+
+def job_of(path):
+    # A view szegmensek nem számítanak, ugyanaz a job több view alól is elérhető
+    segments = [unquote(s) for s in path.strip('/').split('/')]
+    out = []
+    i = 0
+    while i < len(segments):
+        if segments[i] == 'view':
+            i += 2
+            continue
+        out.append(segments[i])
+        i += 1
+    return '/' + '/'.join(out)
+
+
+class FakeJenkinsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # A fejléc és a törzs külön write; Nagle nélkül nincs 40 ms-os késleltetett ACK várakozás
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200, etag=None):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        # A Jenkins (Jetty) gzip-pel tömörít, ha a kliens kéri
+        compressed = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if compressed:
+            body = gzip.compress(body, compresslevel=6)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Vary', 'Accept-Encoding')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.server.record(len(body))
+        self._write_throttled(body)
+
+    def _write_throttled(self, body):
+        # Lassú kapcsolat szimulálása: a törzs bandwidth_kbps sebességgel, darabokban megy ki,
+        # a párhuzamos válaszok ugyanazon a vonalon osztoznak
+        rate = self.server.config.bandwidth_kbps * 1000 / 8
+        if not rate:
+            self.wfile.write(body)
+            return
+        for i in range(0, len(body), 16 * 1024):
+            chunk = body[i:i + 16 * 1024]
+            with self.server.link_lock:
+                time.sleep(len(chunk) / rate)
+            self.wfile.write(chunk)
+
+    def _send_not_modified(self, etag):
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        self.server.record(0)
+
+    def do_GET(self):
+        config = self.server.config
+        if config.latency_ms:
+            time.sleep(config.latency_ms / 1000)
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+
+        m = re.match(r'(.*)/(\d+)/execution/node/(\d+)/wfapi/describe$', parts.path)
+        if m:
+            build_id = int(m.group(2))
+            node = None
+            if 1 <= build_id <= config.builds:
+                node = make_node(config, job_of(m.group(1)), build_id, int(m.group(3)))
+            if node is None:
+                return self._send_json({'message': 'not found'}, status=404)
+            return self._send_json(node)
+
+        m = re.match(r'(.*)/(\d+)/wfapi/describe$', parts.path)
+        if m:
+            build_id = int(m.group(2))
+            if not 1 <= build_id <= config.builds:
+                return self._send_json({'message': 'not found'}, status=404)
+            return self._send_json(self.server.build_bytes(job_of(m.group(1)), build_id))
+
+        m = re.match(r'(.*)/wfapi/runs$', parts.path)
+        if m:
+            job = job_of(m.group(1))
+            ids = range(config.builds, 0, -1)
+            since = query.get('since', [None])[0]
+            if since:
+                ids = [i for i in ids if i > int(since.lstrip('#'))]
+            else:
+                ids = list(ids)[:config.runs_limit]
+            body = b'[' + b','.join(self.server.build_bytes(job, i) for i in ids) + b']'
+            etag = f'"{zlib.crc32(body):08x}"'
+            if self.headers.get('If-None-Match') == etag:
+                return self._send_not_modified(etag)
+            return self._send_json(body, etag=etag)
+
+        m = re.match(r'(.*)/api/json$', parts.path)
+        if m:
+            listing = self.server.listing(m.group(1))
+            if listing is None:
+                return self._send_json({'message': 'not found'}, status=404)
+            return self._send_json(listing)
+
+        return self._send_json({'message': 'not found'}, status=404)
+
+
+class FakeJenkinsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, FakeJenkinsHandler)
+        self.config = config
+        self.requests = 0
+        self.bytes_sent = 0
+        self._stats_lock = threading.Lock()
+        self.link_lock = threading.Lock()
+        self.build_bytes = lru_cache(maxsize=100_000)(
+            lambda job, build_id: json.dumps(make_build(config, job, build_id)).encode())
+
+    def record(self, size):
+        with self._stats_lock:
+            self.requests += 1
+            self.bytes_sent += size
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.requests = 0
+            self.bytes_sent = 0
+
+    def listing(self, path):
+        # Mappák és view-k a JSON API formátumában (a tree= szűrőt nem értelmezzük)
+        config = self.config
+        job = job_of(path)
+        if job == '/':
+            views = [{'name': 'all', 'url': f"{self.url}/"}]
+            views += [{'name': f"  {name}", 'url': f"{self.url}/view/%20%20{name}/"} for name in config.folders]
+            jobs = [{'_class': FOLDER_CLASS, 'name': name, 'url': f"{self.url}/job/{name}/"}
+                    for name in config.folders]
+            in_view = re.search(r'/view/([^/]+)/?$', path)
+            if in_view:
+                name = unquote(in_view.group(1)).strip()
+                jobs = [j for j in jobs if j['name'] == name]
+                views = []
+            return {'_class': 'hudson.model.Hudson', 'jobs': jobs, 'views': views}
+        m = re.match(r'^/job/([^/]+)$', job)
+        if m and m.group(1) in config.folders:
+            folder = m.group(1)
+            jobs = [{'_class': PIPELINE_CLASS, 'name': f"job-{i:03d}",
+                     'url': f"{self.url}/job/{folder}/job/job-{i:03d}/"}
+                    for i in range(config.jobs_per_folder)]
+            return {'_class': FOLDER_CLASS, 'jobs': jobs, 'views': [{'name': 'All', 'url': f"{self.url}/job/{folder}/"}]}
+        # Minden más útvonal pipeline job; a revízió csak a build számtól függ, így a
+        # két szerver azonos számú buildjei ugyanarra a commitra futnak
+        builds = [{'number': i, 'actions': [{}, {'lastBuiltRevision': {
+                      'SHA1': hashlib.sha1(f"rev-{i}".encode()).hexdigest()}}]}
+                  for i in range(config.builds, 0, -1)]
+        return {'_class': PIPELINE_CLASS, 'allBuilds': builds}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(config=None, host='127.0.0.1', port=0):
+    # Háttérszálon futó szerver; a .url a controller gyökér URL-je
+    server = FakeJenkinsServer((host, port), config or FakeJenkinsConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Szintetikus Jenkins wfapi kiszolgáló")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--builds', type=int, default=50, help="Buildek száma jobonként")
+    parser.add_argument('--fanout', type=int, default=0, help="Párhuzamos ág stage-ek száma buildenként")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Mesterséges késleltetés kérésenként")
+    parser.add_argument('--runs-limit', type=int, default=10, help="wfapi/runs ablak mérete (since nélkül)")
+    parser.add_argument('--in-progress', type=int, default=0, help="A legújabb N build még fut")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--folder', action='append', default=[], help="Mappa a gyökérben (ismételhető)")
+    parser.add_argument('--jobs-per-folder', type=int, default=0)
+    parser.add_argument('--steps-per-stage', type=int, default=3, help="Lépések száma stage-enként")
+    parser.add_argument('--bandwidth-kbps', type=float, default=0, help="Sávszélesség korlát (kbit/s, 0 = nincs)")
+    args = parser.parse_args()
+
+    config = FakeJenkinsConfig(args.builds, args.fanout, args.latency_ms, args.runs_limit,
+                               args.in_progress, args.seed, args.folder, args.jobs_per_folder,
+                               args.steps_per_stage, args.bandwidth_kbps)
+    server = FakeJenkinsServer((args.host, args.port), config)
+    print(f"Fake Jenkins: {server.url} ({args.builds} build, {args.fanout} párhuzamos ág)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
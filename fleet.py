@@ -0,0 +1,148 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import jenkins_fetch
+from harvester import harvest_job
+from jenkins_fetch import get_json, job_key
+
+FOLDER_CLASSES = {
+    'com.cloudbees.hudson.plugins.folder.Folder',
+    'jenkins.branch.OrganizationFolder',
+    'org.jenkinsci.plugins.workflow.multibranch.WorkflowMultiBranchProject',
+}
+PIPELINE_CLASSES = {'org.jenkinsci.plugins.workflow.job.WorkflowJob'}
+# Csak a bejáráshoz szükséges mezők, egy szinttel lejjebb nem kérünk semmit
+TREE = "jobs[name,url,_class],views[name,url]"
+
+
+def discover_jobs(root_url, user, token, folders=None):
+    # Szélességi bejárás a JSON API-n: mappák és view-k szintenként párhuzamosan.
+    # folders megadása esetén a gyökérből csak ezekbe a mappákba lépünk be.
+    root_url = root_url.rstrip('/')
+    pending = [root_url]
+    visited = {root_url}
+    jobs = {}
+
+    def listing(url):
+        try:
+            return url, get_json(f"{url}/api/json", user, token, params={'tree': TREE})
+        except Exception as e:
+            print(f"  HIBA a bejáráskor: {url} ({e})")
+            return url, {}
+
+    with ThreadPoolExecutor(max_workers=jenkins_fetch.MAX_WORKERS_PER_CONTROLLER) as pool:
+        while pending:
+            level, pending = pending, []
+            for url, data in pool.map(listing, level):
+                at_root = url == root_url
+                for item in data.get('jobs', []):
+                    item_url = item['url'].rstrip('/')
+                    cls = item.get('_class', '')
+                    if cls in PIPELINE_CLASSES:
+                        jobs.setdefault(job_key(item_url), item_url)
+                    elif cls in FOLDER_CLASSES:
+                        if at_root and folders and item['name'] not in folders:
+                            continue
+                        if item_url not in visited:
+                            visited.add(item_url)
+                            pending.append(item_url)
+                for view in data.get('views', []):
+                    view_url = view['url'].rstrip('/')
+                    if at_root and folders and view['name'].strip() not in folders:
+                        continue
+                    if view_url not in visited:
+                        visited.add(view_url)
+                        pending.append(view_url)
+
+    print(f"  {len(jobs)} pipeline job: {root_url}")
+    return sorted(jobs.values())
+
+
+def relative_job_path(job_url, folder_map=None):
+    # /job/merge-requests/job/X -> merge-requests/X, a régi->új mappa átnevezésekkel
+    _, path = job_key(job_url)
+    names = path.strip('/').split('/')[1::2]
+    if folder_map and names:
+        names[0] = folder_map.get(names[0], names[0])
+    return '/'.join(names)
+
+
+def pair_jobs(old_jobs, new_jobs, folder_map=None):
+    # A régi jobok útvonalát az új controller mappaneveire képezzük le, és név szerint párosítunk
+    new_by_path = {relative_job_path(url): url for url in new_jobs}
+    pairs = []
+    unmatched_old = []
+    for url in old_jobs:
+        new_url = new_by_path.pop(relative_job_path(url, folder_map), None)
+        if new_url is None:
+            unmatched_old.append(url)
+        else:
+            pairs.append((url, new_url))
+    return pairs, unmatched_old, sorted(new_by_path.values())
+
+
+def collect_fleet(pairs, credentials_old, credentials_new, store, global_workers=None):
+    # Minden job inkrementális szinkronja párhuzamosan; a kérésszámot a fetch réteg
+    # globális és controllerenkénti korlátja fogja vissza
+    tasks = []
+    for old_url, new_url in pairs:
+        tasks.append((old_url, credentials_old))
+        tasks.append((new_url, credentials_new))
+
+    def harvest(task):
+        url, (user, token) = task
+        try:
+            return harvest_job(url, user, token, url.rsplit('/', 1)[-1], store)
+        except Exception as e:
+            print(f"  HIBA a szinkronkor: {url} ({e})")
+            return 0
+
+    with ThreadPoolExecutor(max_workers=global_workers or jenkins_fetch.MAX_WORKERS_GLOBAL) as pool:
+        return sum(pool.map(harvest, tasks))
+
+
+def report_filename(name):
+    return re.sub(r'[^\w.-]+', '_', name)
+
+
+def summary_row(name, df_regi, df_uj):
+    avg_regi = df_regi['_Total'].mean()
+    avg_uj = df_uj['_Total'].mean()
+    return {
+        'Job': name,
+        'Builds': len(df_regi),
+        'Régi Átlag (s)': avg_regi,
+        'Új Átlag (s)': avg_uj,
+        'Különbség (s)': avg_uj - avg_regi,
+        '%': (avg_uj - avg_regi) / avg_regi * 100 if avg_regi > 0 else 0,
+    }
+
+
+def write_summary(summary, filename):
+    import pandas as pd
+
+    df_summary = pd.DataFrame(summary)
+    if not df_summary.empty:
+        df_summary = df_summary.sort_values('Különbség (s)', ascending=False)
+        df_summary.to_csv(filename, index=False, sep=';', decimal=',')
+    return df_summary
+
+
+def fleet_comparison(pairs, store, output_dir, last_n=None, folder_map=None):
+    # Páronként ugyanaz a régi vs. új összehasonlító CSV, mint a scripteké, plusz egy összesítő
+    from report import export_comparison_csv, prepare_comparison
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary = []
+    for old_url, new_url in pairs:
+        df_regi = store.load_frame(*job_key(old_url), "Régi Job", last_n=last_n)
+        df_uj = store.load_frame(*job_key(new_url), "Új Job", last_n=last_n)
+        if df_regi.empty or df_uj.empty:
+            continue
+        df_regi, df_uj, all_stages = prepare_comparison(df_regi, df_uj, last_n=last_n)
+        name = relative_job_path(old_url, folder_map)
+        export_comparison_csv(df_regi, df_uj, all_stages,
+                              os.path.join(output_dir, report_filename(name) + '.csv'))
+        summary.append(summary_row(name, df_regi, df_uj))
+    return write_summary(summary, os.path.join(output_dir, 'fleet_summary.csv'))
@@ -0,0 +1,92 @@
+import argparse
+import os
+
+from dotenv import load_dotenv
+
+from build_cache import is_finished
+from build_store import BuildStore
+from jenkins_fetch import fetch_builds, fetch_runs, fetch_stage_steps, job_key
+
+load_dotenv()
+
+
+def harvest_job(job_url, user, token, label, store, backfill_from=None, steps=False):
+    # Inkrementális szinkron: csak a store-ban még nem szereplő buildeket kérjük le
+    job_url = job_url.rstrip('/')
+    controller, job = job_key(job_url)
+    runs_url = f"{job_url}/wfapi/runs"
+    state = store.get_state(controller, job)
+    known = store.known_ids(controller, job)
+
+    print(f"\nSzinkron: {label} ({job})")
+    if state is None:
+        max_id = 0
+        pending = set()
+        runs = fetch_runs(runs_url, user, token)
+    else:
+        max_id = state['max_build_id']
+        pending = set(state['pending'])
+        try:
+            runs = fetch_runs(runs_url, user, token, since=max_id)
+        except Exception as e:
+            # Ha a since build már törölve lett, a sima ablakból folytatjuk
+            print(f"  since=#{max_id} sikertelen ({e}), teljes ablak lekérése")
+            runs = fetch_runs(runs_url, user, token)
+
+    builds = [b for b in runs if int(b['id']) not in known]
+    run_ids = {int(b['id']) for b in runs}
+
+    # Hiányzó build számok: az ablak alatti rész (backfill), a lyukak és a futásban lévők
+    lowest = min(run_ids) if run_ids else max_id + 1
+    wanted = set(pending)
+    if state is not None:
+        wanted.update(range(max_id + 1, lowest))
+    if backfill_from is not None:
+        wanted.update(range(backfill_from, lowest))
+    wanted -= known
+    wanted -= run_ids
+    if wanted:
+        print(f"  {len(wanted)} további build lekérése egyenként...")
+        ids = sorted(wanted)
+        fetched = fetch_builds(job_url, ids, user, token, label)
+        builds.extend(b for b in fetched if b)
+
+    finished = [b for b in builds if is_finished(b)]
+    pending = {int(b['id']) for b in builds if not is_finished(b)}
+    added = store.append(controller, job, finished)
+    if steps and finished:
+        # Mély mód: az újonnan tárolt buildek stage-enkénti lépései is
+        store.append_steps(controller, job, fetch_stage_steps(job_url, finished, user, token))
+
+    seen = [int(b['id']) for b in builds]
+    max_id = max([max_id] + seen)
+    store.set_state(controller, job, max_id, pending)
+
+    print(f"  {added} új build mentve, legnagyobb build: #{max_id}, futásban: {len(pending)}")
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jenkins build history inkrementális szinkronja")
+    parser.add_argument('job_url', nargs='+', help="Job URL (wfapi nélkül)")
+    parser.add_argument('--token-env', default='JENKINS_TOKEN_OLD',
+                        help="A tokent tartalmazó környezeti változó neve")
+    parser.add_argument('--backfill-from', type=int, default=None,
+                        help="Első szinkronkor ettől a build számtól kezdve tölti vissza a történetet")
+    parser.add_argument('--steps', action='store_true',
+                        help="Az új buildek stage-enkénti lépéseit is lekéri (execution/node/*/wfapi/describe)")
+    args = parser.parse_args()
+
+    user = os.getenv("JENKINS_USER")
+    token = os.getenv(args.token_env)
+    store = BuildStore()
+    try:
+        for job_url in args.job_url:
+            harvest_job(job_url, user, token, job_url.rsplit('/', 1)[-1], store, args.backfill_from,
+                        args.steps)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
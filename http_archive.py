@@ -0,0 +1,178 @@
+import argparse
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+# Rögzítés: minden Jenkins válasz egy tömörített, URL szerint indexelt SQLite archívumba kerül.
+# Visszajátszás: a teljes fetch réteg az archívumból dolgozik, hálózat nélkül, determinisztikusan.
+# A két mód kizárja egymást; mindkettőben kikapcsol a fájl cache, hogy minden kérés átmenjen rajtuk.
+RECORD_PATH = os.getenv("JENKINS_RECORD")
+REPLAY_PATH = os.getenv("JENKINS_REPLAY")
+# Ezek a válasz fejlécek kerülnek az archívumba (a visszajátszott válasz is ezeket kapja)
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    recorded_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+_mode = None
+_archive = None
+_config_lock = threading.Lock()
+
+
+def request_key(method, url):
+    # A lekérdezési paraméterek sorrendje nem számít; hitelesítési adat nem kerül a kulcsba
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method} {urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))}"
+
+
+class HttpArchive:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def put(self, key, status, headers, body):
+        kept = {name: headers[name] for name in KEPT_HEADERS if name in headers}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, status, json.dumps(kept), zlib.compress(body, 6), len(body), time.time()))
+            self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        status, headers, body = row
+        return status, json.loads(headers), zlib.decompress(body)
+
+    def summary(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, size, length(body), recorded_at FROM responses").fetchall()
+        controllers = {}
+        for key, size, stored, recorded_at in rows:
+            parts = urlsplit(key.split(' ', 1)[1])
+            s = controllers.setdefault(f"{parts.scheme}://{parts.netloc}",
+                                       {'responses': 0, 'bytes': 0, 'stored_bytes': 0, 'last': 0})
+            s['responses'] += 1
+            s['bytes'] += size
+            s['stored_bytes'] += stored
+            s['last'] = max(s['last'], recorded_at)
+        return controllers
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RecordingAdapter(HTTPAdapter):
+    # A valódi kérés után a kicsomagolt törzs az archívumba kerül; streamelt kérésnél is
+    # beolvassuk, a requests ezután a memóriából adja tovább
+    def __init__(self, archive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # A 304 nem tartalmaz törzset, a korábbi teljes választ nem írhatja felül
+        if response.status_code != 304:
+            self.archive.put(request_key(request.method, request.url), response.status_code,
+                             response.headers, response.content)
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    # Hálózat nélküli válaszok az archívumból; a feltételes kéréseket a tárolt ETag alapján
+    # 304-gyel válaszolja meg, a hiányzó URL kapcsolódási hibát ad
+    def __init__(self, archive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        entry = self.archive.get(request_key(request.method, request.url))
+        if entry is None:
+            raise requests.ConnectionError(f"Nincs az archívumban (visszajátszás): {request.url}",
+                                           request=request)
+        status, headers, body = entry
+        etag = headers.get('ETag')
+        if etag and request.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        headers = dict(headers, **{'Content-Length': str(len(body))})
+        raw = HTTPResponse(body=io.BytesIO(body), headers=headers, status=status, preload_content=False,
+                           decode_content=False, request_method=request.method, request_url=request.url)
+        return self.build_response(request, raw)
+
+
+def configure(record=None, replay=None):
+    # Futás elején hívandó, a sessionök létrehozása előtt
+    global _mode, _archive
+    if record and replay:
+        raise ValueError("A rögzítés és a visszajátszás egyszerre nem kapcsolható be")
+    with _config_lock:
+        if _archive is not None:
+            _archive.close()
+        _mode, _archive = None, None
+        if record:
+            _mode, _archive = 'record', HttpArchive(record)
+        elif replay:
+            if not os.path.exists(replay):
+                raise FileNotFoundError(f"Nincs ilyen archívum: {replay}")
+            _mode, _archive = 'replay', HttpArchive(replay)
+    return _mode
+
+
+def mode():
+    return _mode
+
+
+def make_adapter(**kwargs):
+    # A jenkins_fetch sessionjei ezen keresztül kapják a transport adaptert
+    if _mode == 'record':
+        return RecordingAdapter(_archive, **kwargs)
+    if _mode == 'replay':
+        return ReplayAdapter(_archive, **kwargs)
+    return HTTPAdapter(**kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP archívum tartalma controllerenként")
+    parser.add_argument('archive', help="A JENKINS_RECORD-dal rögzített archívum")
+    args = parser.parse_args()
+
+    archive = HttpArchive(args.archive)
+    print(f"{'Controller':<40} {'Válasz':>7} {'JSON (KB)':>10} {'Tárolt (KB)':>12}  Utolsó rögzítés")
+    for controller, s in sorted(archive.summary().items()):
+        print(f"{controller:<40} {s['responses']:>7} {s['bytes'] / 1024:>10.1f} {s['stored_bytes'] / 1024:>12.1f}  "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(s['last']))}")
+
+
+if RECORD_PATH or REPLAY_PATH:
+    configure(RECORD_PATH, REPLAY_PATH)
+
+
+if __name__ == "__main__":
+    main()
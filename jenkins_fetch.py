@@ -0,0 +1,372 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+
+import http_archive
+import profiler
+from build_cache import default_cache
+from wfapi_stream import iter_response_array
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Controllerenként ennyi párhuzamos kérés mehet egyszerre, összesen pedig ennyi
+MAX_WORKERS_PER_CONTROLLER = int(os.getenv("JENKINS_MAX_WORKERS", "4"))
+MAX_WORKERS_GLOBAL = int(os.getenv("JENKINS_MAX_WORKERS_GLOBAL", "16"))
+# A wfapi nem ismeri a tree= szűrőt, a válaszok méretét csak a tömörített átvitel csökkenti
+ACCEPT_ENCODING = os.getenv("JENKINS_ACCEPT_ENCODING", "gzip")
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_global_slots = threading.BoundedSemaphore(MAX_WORKERS_GLOBAL)
+_controller_slots = {}
+_transfer = {}
+_transfer_lock = threading.Lock()
+
+
+def controller_key(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def job_key(base_url):
+    # A cache kulcs független attól, melyik view-n keresztül értük el a jobot
+    parts = urlsplit(base_url)
+    segments = parts.path.strip('/').split('/')
+    job_segments = []
+    i = 0
+    while i < len(segments):
+        if segments[i] == 'view' and i + 1 < len(segments):
+            i += 2
+            continue
+        job_segments.append(segments[i])
+        i += 1
+    return f"{parts.scheme}://{parts.netloc}", '/' + '/'.join(job_segments)
+
+
+def get_session(url, user, token):
+    # Base URL-enként egy keep-alive session, így a TCP/TLS kézfogás csak egyszer történik meg
+    key = (controller_key(url), user, token)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            session.auth = (user, token)
+            session.verify = False
+            session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+            adapter = http_archive.make_adapter(pool_connections=1, pool_maxsize=MAX_WORKERS_PER_CONTROLLER)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+    return session
+
+
+def set_concurrency(global_limit=None, per_controller=None):
+    # A korlátok futás közbeni módosítása (pl. parancssori kapcsolóból), a kérések indulása előtt
+    global MAX_WORKERS_GLOBAL, MAX_WORKERS_PER_CONTROLLER, _global_slots
+    with _sessions_lock:
+        if global_limit is not None:
+            MAX_WORKERS_GLOBAL = global_limit
+            _global_slots = threading.BoundedSemaphore(global_limit)
+        if per_controller is not None:
+            MAX_WORKERS_PER_CONTROLLER = per_controller
+            _controller_slots.clear()
+            _sessions.clear()
+
+
+@contextmanager
+def request_slot(url):
+    # Minden kérés a globális és a controllerenkénti korláton is átmegy,
+    # akárhány egymásba ágyazott pool indítja is
+    key = controller_key(url)
+    with _sessions_lock:
+        slots = _controller_slots.get(key)
+        if slots is None:
+            slots = threading.BoundedSemaphore(MAX_WORKERS_PER_CONTROLLER)
+            _controller_slots[key] = slots
+        global_slots = _global_slots
+    with global_slots, slots:
+        yield
+
+
+def record_transfer(url, response, body_bytes=None, elapsed=0.0):
+    # Kérésenként a hálózaton átjött (esetleg tömörített) és a kicsomagolt törzs mérete és a
+    # válaszidő, controllerenként összesítve; --profile módban a trace-be is bekerül
+    wire = response.raw.tell() if response.raw is not None else 0
+    body = len(response.content) if body_bytes is None else body_bytes
+    latency = response.elapsed.total_seconds()
+    key = controller_key(url)
+    with _transfer_lock:
+        stats = _transfer.get(key)
+        if stats is None:
+            stats = _transfer[key] = {'requests': 0, 'wire_bytes': 0, 'body_bytes': 0, 'latency_s': 0.0}
+        stats['requests'] += 1
+        stats['wire_bytes'] += wire
+        stats['body_bytes'] += body
+        stats['latency_s'] += latency
+    profiler.record_http(key, response.url, response.status_code, wire, body, latency, elapsed)
+
+
+def transfer_stats():
+    with _transfer_lock:
+        return {key: dict(stats) for key, stats in _transfer.items()}
+
+
+def reset_transfer_stats():
+    with _transfer_lock:
+        _transfer.clear()
+
+
+def print_transfer_stats():
+    stats = transfer_stats()
+    if not stats:
+        return
+    print(f"\n{'Controller':<40} {'Kérés':>7} {'Átvitt (KB)':>12} {'Kicsomagolt (KB)':>17} {'Arány':>6} "
+          f"{'Átl. késl. (ms)':>16}")
+    for key, s in sorted(stats.items()):
+        ratio = s['wire_bytes'] / s['body_bytes'] if s['body_bytes'] else 1.0
+        print(f"{key:<40} {s['requests']:>7} {s['wire_bytes'] / 1024:>12.1f} "
+              f"{s['body_bytes'] / 1024:>17.1f} {ratio:>6.0%} {s['latency_s'] / s['requests'] * 1000:>16.1f}")
+
+
+def http_get(url, user, token, **kwargs):
+    # Egy teljes (nem streamelt) kérés a korlátokon át, átviteli statisztikával
+    with request_slot(url):
+        start = time.perf_counter()
+        response = get_session(url, user, token).get(url, **kwargs)
+        elapsed = time.perf_counter() - start
+    record_transfer(url, response, elapsed=elapsed)
+    return response
+
+
+def get_json(url, user, token, params=None):
+    response = http_get(url, user, token, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def _cache():
+    # Rögzítéskor és visszajátszáskor minden kérésnek az archívumon kell átmennie
+    return default_cache() if http_archive.mode() is None else None
+
+
+def close_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def fetch_single_build(base_url, build_id, user, token, job_label):
+    url = f"{base_url}/{build_id}/wfapi/describe"
+    cache = _cache()
+    controller, job_path = job_key(base_url)
+    if cache is not None:
+        cached = cache.get(controller, job_path, build_id)
+        if cached is not None:
+            print(f"Cache: {job_label} #{build_id}")
+            return cached
+
+    print(f"Lekérés: {job_label} #{build_id}...")
+    try:
+        response = http_get(url, user, token)
+        if response.status_code != 200:
+            print(f"  HIBA: {response.status_code} - {url}")
+            return None
+        build = response.json()
+    except Exception as e:
+        print(f"  KIVÉTEL: {e}")
+        return None
+
+    if cache is not None:
+        cache.put(controller, job_path, build_id, build)
+    return build
+
+
+def iter_runs(url, user, token, since=None):
+    # wfapi/runs lista folyamatos feldolgozással: a buildek egyenként jönnek, ahogy a válasz
+    # megérkezik, a lezárt buildek közben a cache-be is bekerülnek.
+    # since=N esetén csak az N-nél újabb buildeket kérjük le (a 10-es ablakon túl is)
+    cache = _cache()
+    controller, job_path = job_key(url.split('/wfapi/')[0])
+    if cache is not None and since is None:
+        cached_ids = cache.get_runs(controller, job_path)
+        if cached_ids is not None:
+            cached = [cache.get(controller, job_path, build_id) for build_id in cached_ids]
+            if all(build is not None for build in cached):
+                print("  (cache-ből)")
+                yield from cached
+                return
+
+    params = {'since': f"#{since}"} if since is not None else None
+    build_ids = []
+    all_finished = True
+    with request_slot(url):
+        start = time.perf_counter()
+        response = get_session(url, user, token).get(url, params=params, stream=True)
+        headers_s = time.perf_counter() - start
+        stats = {'body_bytes': 0, 'read_s': 0.0, 'decode_s': 0.0}
+        builds = iter_response_array(response, stats=stats)
+        cache_start = time.perf_counter()
+        cache_s = 0.0
+        try:
+            # Hibás státusznál is a finally zárja a választ és rögzíti a kérést
+            response.raise_for_status()
+            for build in builds:
+                if cache is not None:
+                    put_start = time.perf_counter()
+                    if not cache.put(controller, job_path, build.get('id'), build):
+                        all_finished = False
+                    cache_s += time.perf_counter() - put_start
+                    build_ids.append(build.get('id'))
+                yield build
+        finally:
+            # Korai leállásnál is most zárjuk, hogy a mért idők teljesek legyenek. A kérés ideje a
+            # fejlécig eltelt idő és a socket olvasások összege, a dekódolás és a fogyasztó nélkül.
+            builds.close()
+            response.close()
+            record_transfer(url, response, stats['body_bytes'], headers_s + stats['read_s'])
+            if cache is not None:
+                # A trace-ben az olvasás és a dekódolás után, hogy ne fedjék egymást
+                profiler.record_phase('cache.put', cache_start + stats['read_s'] + stats['decode_s'], cache_s)
+
+    if cache is not None and since is None and all_finished:
+        cache.put_runs(controller, job_path, build_ids)
+
+
+def fetch_runs(url, user, token, since=None):
+    return list(iter_runs(url, user, token, since))
+
+
+def fetch_runs_if_changed(url, user, token, since=None, etag=None, last_modified=None):
+    # Feltételes wfapi/runs kérés: 304 esetén (None, validátorok) jön vissza, letöltés nélkül.
+    # A since-es válasz kicsi (csak az újabb buildek), ezért nem streameljük.
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    params = {'since': f"#{since}"} if since is not None else None
+    response = http_get(url, user, token, params=params, headers=headers)
+    validators = (response.headers.get('ETag', etag), response.headers.get('Last-Modified', last_modified))
+    if response.status_code == 304:
+        return None, validators
+    response.raise_for_status()
+    return response.json(), validators
+
+
+def process_build_data(build_data, job_label):
+    if not build_data:
+        return None
+
+    timestamp_ms = build_data.get('startTimeMillis', 0)
+    if timestamp_ms:
+        dt_object = datetime.fromtimestamp(timestamp_ms / 1000)
+        time_str = dt_object.strftime('%Y-%m-%d\n%H:%M')
+    else:
+        time_str = "N/A"
+
+    row = {
+        '_BuildID': build_data.get('id', 'N/A'),
+        '_Total': build_data.get('durationMillis', 0) / 1000,
+        '_Job': job_label,
+        '_Time': time_str,
+        '_StartMs': timestamp_ms,
+    }
+
+    for stage in build_data.get('stages', []):
+        stage_name = stage['name']
+        duration_sec = stage['durationMillis'] / 1000
+        row[stage_name] = duration_sec
+
+    return row
+
+
+def fetch_builds(base_url, build_ids, user, token, label):
+    # Egy controller buildjei a saját, korlátos méretű poolján mennek, a sorrend megmarad
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS_PER_CONTROLLER) as pool:
+        futures = [pool.submit(fetch_single_build, base_url, build_id, user, token, label)
+                   for build_id in build_ids]
+        return [f.result() for f in futures]
+
+
+def fetch_stage_node(base_url, build_id, node_id, user, token):
+    # Egy stage wfapi/describe válasza a lépésekkel; lezárt stage-nél a cache-ből is jöhet
+    url = f"{base_url}/{build_id}/execution/node/{node_id}/wfapi/describe"
+    cache = _cache()
+    controller, job_path = job_key(base_url)
+    cache_id = f"{build_id}/node/{node_id}"
+    if cache is not None:
+        cached = cache.get(controller, job_path, cache_id)
+        if cached is not None:
+            return cached
+    try:
+        response = http_get(url, user, token)
+        if response.status_code != 200:
+            print(f"  HIBA: {response.status_code} - {url}")
+            return None
+        node = response.json()
+    except Exception as e:
+        print(f"  KIVÉTEL: {e}")
+        return None
+    if cache is not None:
+        cache.put(controller, job_path, cache_id, node)
+    return node
+
+
+def fetch_stage_steps(base_url, builds, user, token):
+    # Minden build minden stage-ének lépései párhuzamosan, controllerenként korlátozva;
+    # ugyanaz a (build, node) pár csak egyszer kerül lekérésre.
+    # Eredmény: {build_id: {stage sorszám: [lépések]}}
+    tasks = {}
+    for build in builds:
+        build_id = int(build['id'])
+        for seq, stage in enumerate(build.get('stages', [])):
+            if stage.get('id') is not None:
+                tasks.setdefault((build_id, str(stage['id'])), (build_id, seq))
+    if not tasks:
+        return {}
+
+    print(f"  {len(tasks)} stage lépéseinek lekérése...")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS_PER_CONTROLLER) as pool:
+        nodes = pool.map(lambda key: fetch_stage_node(base_url, key[0], key[1], user, token), tasks)
+        steps = {}
+        for (build_id, seq), node in zip(tasks.values(), nodes):
+            if node is not None:
+                steps.setdefault(build_id, {})[seq] = node.get('stageFlowNodes', [])
+    return steps
+
+
+def fetch_build_pairs(build_pairs, regi, uj, record=False, as_records=False):
+    # regi / uj: (base_url, user, token, label) – a két controller párhuzamosan, egymástól függetlenül.
+    # record=True esetén a lezárt buildek a helyi build store-ba is bekerülnek.
+    # as_records=True esetén soronkénti dictek helyett közös StageTable-ű BuildRecords párt ad
+    ids_regi = [r_id for r_id, _ in build_pairs]
+    ids_uj = [u_id for _, u_id in build_pairs]
+
+    with ThreadPoolExecutor(max_workers=2) as controllers:
+        future_regi = controllers.submit(fetch_builds, regi[0], ids_regi, regi[1], regi[2], regi[3])
+        future_uj = controllers.submit(fetch_builds, uj[0], ids_uj, uj[1], uj[2], uj[3])
+        raw_regi = future_regi.result()
+        raw_uj = future_uj.result()
+
+    if record:
+        from build_store import record_builds
+        record_builds(regi[0], [raw for raw in raw_regi if raw])
+        record_builds(uj[0], [raw for raw in raw_uj if raw])
+
+    if as_records:
+        from stage_matrix import BuildRecords, StageTable
+        table = StageTable()
+        return (BuildRecords(table).extend(raw for raw in raw_regi if raw),
+                BuildRecords(table).extend(raw for raw in raw_uj if raw))
+
+    data_regi = [process_build_data(raw, f"{regi[3]} Job") for raw in raw_regi if raw]
+    data_uj = [process_build_data(raw, f"{uj[3]} Job") for raw in raw_uj if raw]
+    return data_regi, data_uj
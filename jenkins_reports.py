@@ -0,0 +1,482 @@
+import argparse
+import os
+import sys
+
+# A nehéz könyvtárakat (pandas, matplotlib, numpy) csak az azokat igénylő
+# alparancsok töltik be, a fetch út ezek nélkül indul.
+
+
+def _credentials(token_env):
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return os.getenv("JENKINS_USER"), os.getenv(token_env)
+
+
+def _job_label(job_url):
+    return job_url.rstrip('/').rsplit('/', 1)[-1]
+
+
+def cmd_fetch(args):
+    from build_store import default_store
+    from harvester import harvest_job
+
+    user, token = _credentials(args.token_env)
+    store = default_store()
+    for job_url in args.job_url:
+        harvest_job(job_url, user, token, _job_label(job_url), store, args.backfill_from, args.steps)
+        if args.revisions:
+            from jenkins_fetch import job_key
+            from pairing import fetch_revisions
+
+            revisions = fetch_revisions(job_url, user, token)
+            store.set_revisions(*job_key(job_url.rstrip('/')), revisions)
+            print(f"  {len(revisions)} build revízió mentve")
+        if args.snapshot:
+            from jenkins_fetch import job_key
+            from matrix_snapshot import load_matrix
+
+            matrix = load_matrix(store, *job_key(job_url.rstrip('/')), write=True)
+            print(f"  Pillanatkép frissítve: {len(matrix)} build × {len(matrix.stage_names)} stage")
+    import profiler
+    from jenkins_fetch import print_transfer_stats
+
+    if profiler.active() is None:
+        # --profile módban a profil összesítője írja ki
+        print_transfer_stats()
+    return 0
+
+
+def cmd_steps(args):
+    from build_cache import is_finished
+    from build_store import default_store
+    from jenkins_fetch import fetch_single_build, fetch_stage_steps, job_key
+
+    job_url = args.job_url.rstrip('/')
+    controller, job = job_key(job_url)
+    store = default_store()
+    if args.build is not None and store.load_steps(controller, job, build_id=args.build).empty:
+        # Egyetlen build lépésfája élőben: egy describe, majd a stage-ek párhuzamosan
+        user, token = _credentials(args.token_env)
+        build = fetch_single_build(job_url, args.build, user, token, _job_label(job_url))
+        if build is None:
+            return 1
+        if not is_finished(build):
+            # A store append-only, egy futó build részleges ideje később nem frissülne
+            print(f"HIBA: a #{args.build} build még fut ({build.get('status')}), csak lezárt build lépései menthetők.")
+            return 1
+        store.append(controller, job, [build])
+        store.append_steps(controller, job, fetch_stage_steps(job_url, [build], user, token))
+
+    steps = store.load_steps(controller, job, last_n=args.last, stage=args.stage, build_id=args.build)
+    if steps.empty:
+        print("HIBA: nincs tárolt lépés, futtasd a 'fetch --steps' parancsot vagy add meg a --build-et.")
+        return 1
+    steps['Description'] = steps['Description'].fillna('').str.slice(0, 40)
+    summary = (steps.groupby(['Stage', 'StepSeq', 'Step', 'Description'], sort=False)['Duration']
+               .agg(['count', 'median', 'mean', 'max']).reset_index())
+    print(f"{'Stage':<28} {'#':>3} {'Lépés':<16} {'Leírás':<40} {'N':>4} {'Medián':>8} {'Átlag':>8} {'Max':>8}")
+    print("-" * 122)
+    for row in summary.itertuples(index=False):
+        print(f"{row.Stage[:28]:<28} {row.StepSeq:>3} {row.Step[:16]:<16} {row.Description:<40} "
+              f"{row.count:>4} {row[5]:>8.1f} {row[6]:>8.1f} {row[7]:>8.1f}")
+    return 0
+
+
+def cmd_stats(args):
+    from build_store import default_store
+    from jenkins_fetch import job_key
+    from stage_sketch import merge_sketches, print_sketch_table
+
+    store = default_store()
+    sketches = merge_sketches(store.stage_sketches(*job_key(url.rstrip('/'))) for url in args.job_url)
+    if not sketches:
+        print("HIBA: nincs tárolt build, futtasd előbb a 'fetch' parancsot.")
+        return 1
+    print_sketch_table(sketches, args.quantile or (0.5, 0.95))
+    return 0
+
+
+def cmd_watch(args):
+    from build_store import default_store
+    from watch import JobWatcher, serve_metrics
+
+    old_credentials = _credentials('JENKINS_TOKEN_OLD')
+    new_credentials = _credentials('JENKINS_TOKEN_NEW')
+    watcher = JobWatcher(default_store(), **{k: v for k, v in (
+        ('min_interval', args.min_interval), ('max_interval', args.max_interval), ('recent', args.recent))
+        if v is not None})
+    for old_url, new_url in args.pair:
+        watcher.add_pair(_job_label(old_url), (old_url, *old_credentials), (new_url, *new_credentials))
+    server = serve_metrics(watcher, args.host, args.port)
+    print(f"Metrikák: http://{args.host}:{server.server_address[1]}/metrics")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+def _load_pair(args):
+    from build_store import default_store
+    from jenkins_fetch import job_key
+
+    store = default_store()
+    key_regi = job_key(args.old_job.rstrip('/'))
+    key_uj = job_key(args.new_job.rstrip('/'))
+    # Index szerinti párosításnál elég az utolsó N build, különben a teljes történetből párosítunk
+    last_n = args.last if args.pair == 'index' else None
+    df_regi = store.load_frame(*key_regi, "Régi Job", last_n=last_n)
+    df_uj = store.load_frame(*key_uj, "Új Job", last_n=last_n)
+    if df_regi.empty or df_uj.empty:
+        print("HIBA: valamelyik jobhoz nincs tárolt build, futtasd előbb a 'fetch' parancsot.")
+        return None
+    if args.outliers:
+        import pandas as pd
+
+        from outliers import filter_outliers, print_outlier_report
+
+        builds_before = len(df_regi) + len(df_uj)
+        df_regi, excluded_regi = filter_outliers(df_regi, "Régi Job", exclude=args.exclude, keep=args.keep)
+        df_uj, excluded_uj = filter_outliers(df_uj, "Új Job", exclude=args.exclude, keep=args.keep)
+        print_outlier_report(pd.concat([excluded_regi, excluded_uj], ignore_index=True), builds_before)
+    elif args.exclude:
+        df_regi = df_regi[~df_regi['_BuildID'].isin(args.exclude)].reset_index(drop=True)
+        df_uj = df_uj[~df_uj['_BuildID'].isin(args.exclude)].reset_index(drop=True)
+    if args.pair == 'index':
+        return df_regi, df_uj
+
+    from pairing import pair_builds, paired_frames, print_pairing_summary
+
+    revisions = (None, None)
+    if args.pair == 'auto':
+        revisions = (store.get_revisions(*key_regi), store.get_revisions(*key_uj))
+    pairs, unmatched_regi, unmatched_uj = pair_builds(df_regi, df_uj, args.tolerance, *revisions)
+    print_pairing_summary(pairs, unmatched_regi, unmatched_uj)
+    if pairs.empty:
+        print("HIBA: egyetlen build sem párosítható, növeld a --tolerance értékét.")
+        return None
+    return paired_frames(df_regi, df_uj, pairs)
+
+
+def cmd_compare(args):
+    from report import prepare_comparison, print_build_table, print_stage_averages
+    from stage_stats import BOOTSTRAP_RESAMPLES, print_stage_differences, stage_differences
+
+    pair = _load_pair(args)
+    if pair is None:
+        return 1
+    df_regi, df_uj, all_stages = prepare_comparison(*pair, last_n=args.last)
+    if args.pair == 'index':
+        print(f"\n✓ {len(df_regi)} build párosítható (index alapján)")
+    print_build_table(df_regi, df_uj)
+    print_stage_averages(df_regi, df_uj, all_stages)
+    resamples = BOOTSTRAP_RESAMPLES if args.resamples is None else args.resamples
+    if resamples:
+        print_stage_differences(stage_differences(df_regi, df_uj, all_stages, resamples=resamples))
+    return 0
+
+
+def cmd_export(args):
+    from report import export_comparison_csv, prepare_comparison
+
+    pair = _load_pair(args)
+    if pair is None:
+        return 1
+    df_regi, df_uj, all_stages = prepare_comparison(*pair, last_n=args.last)
+    export_comparison_csv(df_regi, df_uj, all_stages, args.output, spreadsheet=not args.plain_csv)
+    print(f"✓ Mentés sikeres: {args.output}")
+    return 0
+
+
+def cmd_plot(args):
+    if args.output:
+        import matplotlib
+        matplotlib.use('Agg')
+    from report import plot_comparison, prepare_comparison
+
+    pair = _load_pair(args)
+    if pair is None:
+        return 1
+    df_regi, df_uj, all_stages = prepare_comparison(*pair, last_n=args.last)
+    plot_comparison(df_regi, df_uj, all_stages, args.title, output=args.output)
+    return 0
+
+
+def cmd_fleet(args):
+    from build_store import default_store
+    from fleet import collect_fleet, discover_jobs, fleet_comparison, pair_jobs
+    from jenkins_fetch import set_concurrency
+
+    set_concurrency(args.global_workers, args.per_controller)
+    old_credentials = _credentials('JENKINS_TOKEN_OLD')
+    new_credentials = _credentials('JENKINS_TOKEN_NEW')
+    folder_map = dict(f.split('=', 1) if '=' in f else (f, f) for f in args.folder)
+
+    print("Jobok felderítése...")
+    old_jobs = discover_jobs(args.old_root, *old_credentials, folders=set(folder_map) or None)
+    new_jobs = discover_jobs(args.new_root, *new_credentials, folders=set(folder_map.values()) or None)
+    pairs, unmatched_old, unmatched_new = pair_jobs(old_jobs, new_jobs, folder_map)
+    print(f"✓ {len(pairs)} job pár, {len(unmatched_old)} csak a régin, {len(unmatched_new)} csak az újon")
+    for url in unmatched_old:
+        print(f"  Nincs párja (régi): {url}")
+    for url in unmatched_new:
+        print(f"  Nincs párja (új): {url}")
+
+    store = default_store()
+    added = collect_fleet(pairs, old_credentials, new_credentials, store, args.global_workers)
+    print(f"✓ {added} új build mentve")
+
+    if args.charts:
+        from batch_report import batch_report
+
+        summary = batch_report(pairs, store, args.output, last_n=args.last, folder_map=folder_map,
+                               workers=args.workers)
+    else:
+        summary = fleet_comparison(pairs, store, args.output, last_n=args.last, folder_map=folder_map)
+    if summary.empty:
+        print("HIBA: egyik job párhoz sincs tárolt build.")
+        return 1
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+    print(f"\n✓ Mentés sikeres: {args.output}")
+    return 0
+
+
+def cmd_batch(args):
+    from batch_report import batch_report, read_pairs_file
+    from build_store import default_store
+
+    pairs = [(old_url.rstrip('/'), new_url.rstrip('/')) for old_url, new_url in args.pair]
+    if args.pairs_file:
+        pairs += read_pairs_file(args.pairs_file)
+    if not pairs:
+        print("HIBA: adj meg legalább egy job párt (--pair vagy --pairs-file).")
+        return 1
+    summary = batch_report(pairs, default_store(), args.output, last_n=args.last, workers=args.workers,
+                           resamples=args.resamples, charts=not args.no_charts)
+    if summary.empty:
+        print("HIBA: egyik job párhoz sincs tárolt build, futtasd előbb a 'fetch' parancsot.")
+        return 1
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+    print(f"\n✓ Mentés sikeres: {args.output}")
+    return 0
+
+
+def cmd_cloudbuild(args):
+    if args.output:
+        import matplotlib
+        matplotlib.use('Agg')
+    from build_store import default_store
+    from cloudbuild import (CLOUDBUILD_DIR, CLOUDBUILD_STAGE, join_cloudbuild, load_cloudbuild_frame,
+                            plot_cloudbuild_series, print_cloudbuild_summary, read_build_map,
+                            series_columns)
+    from jenkins_fetch import job_key
+
+    df_jenkins = default_store().load_frame(*job_key(args.job_url.rstrip('/')), "Jenkins", last_n=args.last)
+    if df_jenkins.empty:
+        print("HIBA: nincs tárolt build, futtasd előbb a 'fetch' parancsot.")
+        return 1
+    build_map = read_build_map(args.map) if args.map else None
+    df_cloudbuild = load_cloudbuild_frame(args.records or [CLOUDBUILD_DIR], build_map, tag=args.tag)
+    if df_cloudbuild.empty:
+        print("HIBA: nincs Cloud Build rekord a megadott exportokban.")
+        return 1
+    try:
+        series, unmatched_jenkins, unmatched_cloudbuild = join_cloudbuild(
+            df_jenkins, df_cloudbuild, args.stage or CLOUDBUILD_STAGE)
+    except KeyError as e:
+        print(f"HIBA: {e.args[0]}")
+        return 1
+    print_cloudbuild_summary(series, unmatched_jenkins, unmatched_cloudbuild)
+    if series.empty:
+        return 1
+    if args.csv:
+        from export import write_frames
+
+        write_frames([series], args.csv, series_columns(series), spreadsheet=not args.plain_csv)
+        print(f"✓ Mentés sikeres: {args.csv}")
+    if args.output or not args.csv:
+        plot_cloudbuild_series(series, args.title, output=args.output)
+    return 0
+
+
+def cmd_query(args):
+    from store_query import query_main
+
+    return query_main(args.sql, args.preset, args.param, args.output, args.limit, args.plain_csv)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="jenkins_reports", description="Jenkins build riportok")
+    parser.add_argument('--profile', nargs='?', const='jenkins_profile.json', default=None, metavar='FILE',
+                        help="Fázis idők, HTTP statisztika és trace mentése (alapból jenkins_profile.json)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="Fázisonkénti memória csúcs és a legnagyobb foglalások (tracemalloc)")
+    parser.add_argument('--profile-format', choices=['json', 'chrome'], default=None,
+                        help="A trace formátuma: json összesítővel, vagy chrome://tracing / Perfetto")
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument('--record', default=None, metavar='ARCHIVE',
+                         help="Minden Jenkins válasz rögzítése ebbe az archívumba (JENKINS_RECORD)")
+    archive.add_argument('--replay', default=None, metavar='ARCHIVE',
+                         help="Hálózat nélküli futás a rögzített archívumból (JENKINS_REPLAY)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    fetch = sub.add_parser('fetch', help="Buildek inkrementális letöltése a helyi store-ba")
+    fetch.add_argument('job_url', nargs='+', help="Job URL (wfapi nélkül)")
+    fetch.add_argument('--token-env', default='JENKINS_TOKEN_OLD',
+                       help="A tokent tartalmazó környezeti változó neve")
+    fetch.add_argument('--backfill-from', type=int, default=None,
+                       help="Ettől a build számtól kezdve visszatölti a történetet")
+    fetch.add_argument('--steps', action='store_true',
+                       help="Az új buildek stage-enkénti lépéseit is lekéri és tárolja")
+    fetch.add_argument('--revisions', action='store_true',
+                       help="A buildek SCM revízióit is elmenti a párosításhoz")
+    fetch.add_argument('--snapshot', action='store_true',
+                       help="A job mátrix pillanatképét is frissíti (a store-ból olvasó parancsokhoz)")
+    fetch.set_defaults(func=cmd_fetch)
+
+    steps = sub.add_parser('steps', help="Lépésenkénti (sh, echo, ...) időtartamok stage-enként")
+    steps.add_argument('job_url', help="Job URL (wfapi nélkül)")
+    steps.add_argument('--build', type=int, default=None, help="Egy build lépésfája (hiányzó esetén lekéri)")
+    steps.add_argument('--stage', default=None, help="Csak ez a stage")
+    steps.add_argument('--last', type=int, default=None, help="Csak az utolsó N build")
+    steps.add_argument('--token-env', default='JENKINS_TOKEN_OLD',
+                       help="A tokent tartalmazó környezeti változó neve")
+    steps.set_defaults(func=cmd_steps)
+
+    watch = sub.add_parser('watch', help="Folyamatos figyelés és metrika végpont (Prometheus formátum)")
+    watch.add_argument('--pair', nargs=2, action='append', required=True, metavar=('OLD_JOB', 'NEW_JOB'),
+                       help="Régi és új job URL (ismételhető)")
+    watch.add_argument('--host', default='127.0.0.1')
+    watch.add_argument('--port', type=int, default=9108)
+    watch.add_argument('--min-interval', type=float, default=None,
+                       help="Legrövidebb lekérdezési idő másodpercben (JENKINS_WATCH_MIN_INTERVAL)")
+    watch.add_argument('--max-interval', type=float, default=None,
+                       help="Leghosszabb lekérdezési idő másodpercben (JENKINS_WATCH_MAX_INTERVAL)")
+    watch.add_argument('--recent', type=int, default=None,
+                       help="Ennyi legutóbbi build átlagából számol delta-t (JENKINS_WATCH_RECENT)")
+    watch.set_defaults(func=cmd_watch)
+
+    stats = sub.add_parser('stats', help="Stage percentilisek a tárolt vázlatokból (több job összevonva)")
+    stats.add_argument('job_url', nargs='+', help="Job URL (wfapi nélkül)")
+    stats.add_argument('-q', '--quantile', type=float, action='append', default=None,
+                       help="Kvantilis 0 és 1 között (ismételhető, alapból 0.5 és 0.95)")
+    stats.set_defaults(func=cmd_stats)
+
+    def add_pair_args(p):
+        p.add_argument('old_job', help="Régi job URL")
+        p.add_argument('new_job', help="Új job URL")
+        p.add_argument('--last', type=int, default=None, help="Csak az utolsó N build")
+        p.add_argument('--pair', choices=['index', 'time', 'auto'], default='index',
+                       help="Párosítás: sorindex, indulási idő, vagy revízió és utána indulási idő")
+        p.add_argument('--tolerance', type=float, default=None,
+                       help="Időalapú párosítás max. eltérése másodpercben (JENKINS_PAIR_TOLERANCE_S)")
+        p.add_argument('--outliers', action='store_true',
+                       help="Megszakadt, csak várakozó és kiugró buildek kiszűrése (gördülő medián/MAD)")
+        p.add_argument('--exclude', action='append', default=[], metavar='BUILD',
+                       help="Build kézi kizárása mindkét jobból (ismételhető)")
+        p.add_argument('--keep', action='append', default=[], metavar='BUILD',
+                       help="Build megtartása akkor is, ha a szűrő kizárná (ismételhető)")
+
+    compare = sub.add_parser('compare', help="Régi vs. új job táblázatos összehasonlítása")
+    add_pair_args(compare)
+    compare.add_argument('--resamples', type=int, default=None,
+                         help="Bootstrap minták száma a kvantilis CI-hez, 0 = kikapcsolva "
+                              "(alapból JENKINS_BOOTSTRAP_RESAMPLES)")
+    compare.set_defaults(func=cmd_compare)
+
+    export = sub.add_parser('export', help="Összehasonlítás mentése (CSV, NDJSON, Parquet)")
+    add_pair_args(export)
+    export.add_argument('-o', '--output', default="jenkins_comparison_data.csv",
+                        help="A kiterjesztés választja a formátumot: .csv, .csv.gz, .csv.zst, .ndjson, .parquet")
+    export.add_argument('--plain-csv', action='store_true', help="',' elválasztó és '.' tizedesjel")
+    export.set_defaults(func=cmd_export)
+
+    plot = sub.add_parser('plot', help="Stage diagram a régi és az új jobról")
+    add_pair_args(plot)
+    plot.add_argument('-o', '--output', default=None, help="Kimeneti fájl (PNG/SVG), különben ablak")
+    plot.add_argument('--title', default='Jenkins Pipeline Stage Időtartamok - Régi vs. Új Job')
+    plot.set_defaults(func=cmd_plot)
+
+    fleet = sub.add_parser('fleet', help="Az összes job felderítése és összehasonlítása két controller között")
+    fleet.add_argument('--old-root', required=True, help="Régi controller gyökér URL")
+    fleet.add_argument('--new-root', required=True, help="Új controller gyökér URL")
+    fleet.add_argument('--folder', action='append', default=[],
+                       help="Csak ez a mappa (ismételhető), átnevezésnél régi=új")
+    fleet.add_argument('--global-workers', type=int, default=None,
+                       help="Egyidejű kérések összesen (alapból JENKINS_MAX_WORKERS_GLOBAL)")
+    fleet.add_argument('--per-controller', type=int, default=None,
+                       help="Egyidejű kérések controllerenként (alapból JENKINS_MAX_WORKERS)")
+    fleet.add_argument('--last', type=int, default=None, help="Csak az utolsó N build")
+    fleet.add_argument('-o', '--output', default="fleet_comparison", help="Kimeneti könyvtár")
+    fleet.add_argument('--charts', action='store_true',
+                       help="Páronként diagram és szöveges összefoglaló is, process poolban")
+    fleet.add_argument('--workers', type=int, default=None,
+                       help="Riport folyamatok száma (alapból JENKINS_BATCH_WORKERS vagy a magok száma)")
+    fleet.set_defaults(func=cmd_fleet)
+
+    batch = sub.add_parser('batch', help="Sok job pár riportja (diagram, összefoglaló, CSV) párhuzamosan")
+    batch.add_argument('--pair', nargs=2, action='append', default=[], metavar=('OLD_JOB', 'NEW_JOB'),
+                       help="Régi és új job URL (ismételhető)")
+    batch.add_argument('--pairs-file', default=None, help="Soronként egy 'régi_url új_url' pár")
+    batch.add_argument('--last', type=int, default=None, help="Csak az utolsó N build")
+    batch.add_argument('--workers', type=int, default=None,
+                       help="Riport folyamatok száma (alapból JENKINS_BATCH_WORKERS vagy a magok száma)")
+    batch.add_argument('--resamples', type=int, default=0,
+                       help="Bootstrap minták a kvantilis CI táblához az összefoglalóban (0 = nincs)")
+    batch.add_argument('--no-charts', action='store_true', help="Csak összefoglaló és CSV, diagram nélkül")
+    batch.add_argument('-o', '--output', default="batch_reports", help="Kimeneti könyvtár")
+    batch.set_defaults(func=cmd_batch)
+
+    cloudbuild = sub.add_parser('cloudbuild', help="Jenkins stage vs. Cloud Build idők exportált Cloud Build JSON-ból")
+    cloudbuild.add_argument('job_url', help="Job URL (wfapi nélkül)")
+    cloudbuild.add_argument('--records', nargs='+', default=None, metavar='PATH',
+                            help="Cloud Build JSON/NDJSON exportok vagy könyvtárak (alapból JENKINS_CLOUDBUILD_DIR)")
+    cloudbuild.add_argument('--map', default=None,
+                            help="Kézi párosítás fájl, soronként pl. '#908 -> 62a29768'")
+    cloudbuild.add_argument('--tag', default=None, help="Csak az ezzel a taggel rendelkező Cloud Build-ek")
+    cloudbuild.add_argument('--stage', default=None,
+                            help="A Cloud Build-et indító stage (alapból JENKINS_CLOUDBUILD_STAGE)")
+    cloudbuild.add_argument('--last', type=int, default=None, help="Csak az utolsó N build")
+    cloudbuild.add_argument('--csv', default=None,
+                            help="A sorozat mentése (a kiterjesztés választja a formátumot)")
+    cloudbuild.add_argument('--plain-csv', action='store_true', help="',' elválasztó és '.' tizedesjel")
+    cloudbuild.add_argument('-o', '--output', default=None, help="Kimeneti fájl (PNG/SVG), különben ablak")
+    cloudbuild.add_argument('--title', default='Jenkins vs Cloud Build Idők')
+    cloudbuild.set_defaults(func=cmd_cloudbuild)
+
+    # A store_query csak sqlite3-at használ, a parser felépítése így sem tölt be nehéz könyvtárat
+    from store_query import PRESETS, add_query_args
+
+    query = sub.add_parser(
+        'query', help="SQL lekérdezés a store nézetei fölött (build_totals, stage_durations, stage_averages)",
+        epilog="Kész lekérdezések:\n" + "\n".join(f"  {name}: {text}" for name, (text, _) in sorted(PRESETS.items())),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_query_args(query)
+    query.set_defaults(func=cmd_query)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.record or args.replay:
+        import http_archive
+
+        http_archive.configure(args.record, args.replay)
+    if not (args.profile or args.profile_memory or args.profile_format):
+        return args.func(args)
+
+    import profiler
+
+    profiler.enable(memory=args.profile_memory)
+    try:
+        with profiler.phase('command', command=args.command):
+            return args.func(args)
+    finally:
+        profiler.finish(args.profile, args.profile_format)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import argparse
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from profiler import profiled
+
+# A store build × stage mátrixa jobonként egy bináris pillanatképben: JSON fejléc, utána
+# 64 bájtra igazított nyers tömbök. Olvasáskor np.memmap nézetek készülnek másolás nélkül, így a
+# későbbi futások és a batch workerek a parszolás helyett csak leképezik a fájlt.
+SNAPSHOT_ENABLED = os.getenv("JENKINS_SNAPSHOT", "1") == "1"
+# Alapból a store fájl mellé: <store>.snapshots/
+SNAPSHOT_DIR = os.getenv("JENKINS_SNAPSHOT_DIR")
+# A pillanatképet csak a fetch --snapshot és a matrix_snapshot.py írja; 1 esetén a store-ból
+# olvasó parancsok is létrehozzák / frissítik
+SNAPSHOT_WRITE = os.getenv("JENKINS_SNAPSHOT_WRITE", "0") == "1"
+SNAPSHOT_VERSION = 1
+
+_MAGIC = b'JSNAP\x00\x00\x01'
+_PREFIX = struct.Struct('<8sQ')
+_ALIGN = 64
+# Tömb név -> dtype; a durations build × stage, a többi buildenként vagy stage-enként egy érték
+_ARRAYS = {
+    'build_ids': '<i8',
+    'start_ms': '<i8',
+    'totals': '<f8',
+    'durations': '<f4',
+    'last_row': '<i8',
+}
+
+
+def snapshot_path(store_path, controller, job, directory=None):
+    directory = directory or SNAPSHOT_DIR or f"{store_path}.snapshots"
+    key = hashlib.sha1(f"{os.path.abspath(store_path)}\0{controller}\0{job}".encode('utf-8')).hexdigest()[:20]
+    return os.path.join(directory, f"{key}.snap")
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_snapshot(path, controller, job, stage_names, arrays, fingerprint):
+    # Ideiglenes fájlba ír, majd átnevezi: a párhuzamos olvasók mindig teljes fájlt látnak
+    arrays = {name: np.ascontiguousarray(arrays[name], dtype=dtype) for name, dtype in _ARRAYS.items()}
+    layout = {}
+    header = None
+    # A fejléc hossza az offszetektől függ és fordítva; két kör elég, mert az igazítás elnyeli
+    # a számjegyek változását
+    data_start = 0
+    for _ in range(2):
+        offset = data_start
+        for name, array in arrays.items():
+            layout[name] = {'offset': offset, 'shape': list(array.shape)}
+            offset = _aligned(offset + array.nbytes)
+        header = json.dumps({
+            'version': SNAPSHOT_VERSION, 'controller': controller, 'job': job, 'stage_names': stage_names,
+            'count': fingerprint[0], 'max_build_id': fingerprint[1], 'arrays': layout,
+        }, ensure_ascii=False).encode('utf-8')
+        data_start = _aligned(_PREFIX.size + len(header) + _ALIGN)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(_PREFIX.pack(_MAGIC, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(layout[name]['offset'])
+            f.write(memoryview(array).cast('B'))
+    os.replace(tmp, path)
+
+
+def read_snapshot(path):
+    # (fejléc, tömbök) csak olvasható memmap nézetekkel, vagy None, ha nincs vagy más verziójú
+    try:
+        with open(path, 'rb') as f:
+            magic, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != _MAGIC:
+                return None
+            header = json.loads(f.read(header_len))
+    except (OSError, struct.error, ValueError):
+        return None
+    if header.get('version') != SNAPSHOT_VERSION:
+        return None
+    arrays = {}
+    for name, dtype in _ARRAYS.items():
+        spec = header['arrays'][name]
+        shape = tuple(spec['shape'])
+        if 0 in shape:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=spec['offset'], shape=shape)
+    return header, arrays
+
+
+def _records_arrays(records, stage_count=None):
+    # BuildRecords -> a pillanatkép tömbjei; last_row: a stage utolsó előfordulásának sora
+    # (-1, ha nem fordult elő), ebből dől el, hogy az utolsó N build táblájában szerepel-e
+    views = records.to_numpy()
+    matrix = records.to_matrix()
+    stage_count = len(records.table) if stage_count is None else stage_count
+    rows = np.repeat(np.arange(len(records), dtype=np.int64), np.diff(views['offsets']))
+    last_row = np.full(stage_count, -1, dtype=np.int64)
+    np.maximum.at(last_row, views['stage_ids'].astype(np.int64), rows)
+    return {
+        'build_ids': views['build_ids'],
+        'start_ms': views['start_ms'],
+        'totals': matrix.totals,
+        'durations': matrix.durations,
+        'last_row': last_row,
+    }
+
+
+def _extend(arrays, extra):
+    # A régi tömbök után a csak az új buildeket tartalmazó darab; az új stage oszlopok a régi
+    # sorokban nullák, a last_row az új darab sorszámaival eltolva
+    n, old_stages = arrays['durations'].shape
+    stages = extra['durations'].shape[1]
+    durations = np.zeros((n + len(extra['durations']), stages), dtype=np.float32)
+    durations[:n, :old_stages] = arrays['durations']
+    durations[n:] = extra['durations']
+    last_row = np.full(stages, -1, dtype=np.int64)
+    last_row[:old_stages] = arrays['last_row']
+    seen = extra['last_row'] >= 0
+    last_row[seen] = extra['last_row'][seen] + n
+    return {
+        'build_ids': np.concatenate([arrays['build_ids'], extra['build_ids']]),
+        'start_ms': np.concatenate([arrays['start_ms'], extra['start_ms']]),
+        'totals': np.concatenate([arrays['totals'], extra['totals']]),
+        'durations': durations,
+        'last_row': last_row,
+    }
+
+
+def _to_matrix(stage_names, arrays, last_n=None):
+    # Az utolsó N sor nézete; csak azok a stage-ek maradnak, amelyek ezekben a buildekben
+    # előfordulnak, mint a store-ból közvetlenül olvasott mátrixnál
+    from stage_matrix import StageMatrix
+
+    n = len(arrays['build_ids'])
+    start = 0 if last_n is None else max(n - last_n, 0)
+    durations = arrays['durations'][start:]
+    names = stage_names
+    present = arrays['last_row'] >= start
+    if not present.all():
+        columns = np.flatnonzero(present)
+        durations = durations[:, columns]
+        names = [stage_names[c] for c in columns]
+    build_ids = [str(build_id) for build_id in arrays['build_ids'][start:].tolist()]
+    return StageMatrix(build_ids, arrays['totals'][start:], arrays['start_ms'][start:], list(names), durations)
+
+
+@profiled('snapshot')
+def load_matrix(store, controller, job, last_n=None, directory=None, write=SNAPSHOT_WRITE):
+    # A store mátrixa pillanatképen keresztül: egyező pillanatkép esetén csak leképezzük; ha a
+    # store azóta csak új (nagyobb számú) buildekkel bővült, csak azokat olvassuk és hozzáfűzzük;
+    # egyébként teljes újraépítés. Fájlba csak write esetén kerül (írási hibánál memóriában
+    # marad); enélkül pillanatkép hiányában közvetlenül a táblákból olvasunk.
+    from stage_matrix import StageTable
+
+    path = snapshot_path(store.path, controller, job, directory)
+    snapshot = read_snapshot(path)
+    if snapshot is not None and (snapshot[0]['controller'], snapshot[0]['job']) != (controller, job):
+        snapshot = None
+    old_max = snapshot[0]['max_build_id'] if snapshot is not None else 0
+    count, max_build_id, count_upto = store.fingerprint(controller, job, upto_build_id=old_max)
+    if count == 0:
+        return store.load_records(controller, job).to_matrix()
+    if snapshot is not None:
+        header, arrays = snapshot
+        if (header['count'], header['max_build_id']) == (count, max_build_id):
+            return _to_matrix(header['stage_names'], arrays, last_n)
+    if snapshot is not None and count_upto == header['count']:
+        table = StageTable(header['stage_names'])
+        records = store.load_records(controller, job, after_build_id=old_max, table=table)
+        arrays = _extend(arrays, _records_arrays(records, len(table)))
+        stage_names = list(table.names)
+    elif not write:
+        return store.load_records(controller, job, last_n=last_n).to_matrix()
+    else:
+        records = store.load_records(controller, job)
+        arrays = _records_arrays(records)
+        stage_names = list(records.table.names)
+    if not write:
+        return _to_matrix(stage_names, arrays, last_n)
+    try:
+        write_snapshot(path, controller, job, stage_names, arrays, (count, max_build_id))
+    except OSError as e:
+        print(f"  Pillanatkép nem menthető ({e}), a mátrix memóriában marad")
+        return _to_matrix(stage_names, arrays, last_n)
+    header, arrays = read_snapshot(path)
+    return _to_matrix(header['stage_names'], arrays, last_n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build × stage mátrix pillanatképek előállítása a store-ból")
+    parser.add_argument('job_url', nargs='+', help="Job URL (wfapi nélkül)")
+    args = parser.parse_args()
+
+    from build_store import default_store
+    from jenkins_fetch import job_key
+
+    store = default_store()
+    for job_url in args.job_url:
+        controller, job = job_key(job_url.rstrip('/'))
+        matrix = load_matrix(store, controller, job, write=True)
+        path = snapshot_path(store.path, controller, job)
+        print(f"{job}: {len(matrix)} build × {len(matrix.stage_names)} stage, "
+              f"{os.path.getsize(path) / 2**20:.1f} MB -> {path}")
+
+
+if __name__ == "__main__":
+    main()
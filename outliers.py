@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+
+from profiler import profiled
+from stage_matrix import WAIT_OTHER
+
+# Gördülő medián / MAD alapú kiugró érték szűrés a build × stage mátrixon. Minden oszlopra
+# (teljes idő, Wait/Other, stage-ek) a build körüli OUTLIER_WINDOW buildes ablak mediánjától
+# való eltérést a MAD skálájában mérjük; OUTLIER_THRESHOLD felett a build anomáliás.
+OUTLIER_WINDOW = int(os.getenv("JENKINS_OUTLIER_WINDOW", "21"))
+OUTLIER_THRESHOLD = float(os.getenv("JENKINS_OUTLIER_THRESHOLD", "6"))
+# Ennél kisebb skálájú eltérés (s) nem számít, pl. a mindig 0 s-os stage-eknél
+OUTLIER_MIN_SCALE_S = float(os.getenv("JENKINS_OUTLIER_MIN_SCALE", "1"))
+# A többletnek a szokásos teljes idő legalább ekkora hányadának kell lennie, így egy rövid
+# stage ferde eloszlású kilengése nem zárja ki az egész buildet
+OUTLIER_MIN_SHARE = float(os.getenv("JENKINS_OUTLIER_MIN_SHARE", "0.1"))
+# A gördülő medián teljes idő ekkora hányada alatt a build megszakítottnak számít
+ABORTED_FRACTION = 0.25
+# Ennél rövidebb ablakból a MAD nem megbízható, ilyenkor csak a várakozó/megszakadt szűrés fut
+MIN_WINDOW = 15
+# Kézi kizárás, vesszővel elválasztott build számok; mindig érvényes
+EXCLUDE_BUILDS = [b.strip() for b in os.getenv("JENKINS_EXCLUDE_BUILDS", "").split(',') if b.strip()]
+# A gördülő ablakok egyszerre legfeljebb ennyi elemet foglalnak (build × oszlop × ablak)
+_CHUNK_ELEMENTS = 4_000_000
+_MAD_TO_SIGMA = 1.4826
+
+QUEUED = 'csak várakozás'
+ABORTED = 'megszakadt'
+ANOMALOUS = 'kiugró'
+MANUAL = 'kézi kizárás'
+
+
+def rolling_median_mad(values, window=OUTLIER_WINDOW):
+    # Középre igazított gördülő medián és MAD oszloponként; a széleken tükrözött kitöltés.
+    # values: build × oszlop mátrix, az ablakok darabokban készülnek, korlátos memóriával.
+    values = np.asarray(values, dtype=np.float32)
+    n, cols = values.shape
+    if n == 0:
+        return values.copy(), values.copy()
+    window = min(window | 1, n if n % 2 else n - 1)
+    half = window // 2
+    padded = np.pad(values, ((half, half), (0, 0)), mode='reflect') if half else values
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)
+    median = np.empty_like(values)
+    mad = np.empty_like(values)
+    chunk = max(1, _CHUNK_ELEMENTS // max(1, cols * window))
+    for start in range(0, n, chunk):
+        # Páratlan ablakban a medián a középső rendezett elem, teljes rendezés nélkül
+        block = windows[start:start + chunk]
+        med = np.partition(block, half, axis=-1)[..., half]
+        median[start:start + chunk] = med
+        mad[start:start + chunk] = np.partition(np.abs(block - med[..., None]), half, axis=-1)[..., half]
+    return median, mad
+
+
+@profiled('outliers')
+def detect_outliers(df, stages=None, window=OUTLIER_WINDOW, threshold=OUTLIER_THRESHOLD,
+                    min_scale=OUTLIER_MIN_SCALE_S, min_share=OUTLIER_MIN_SHARE, exclude=(), keep=()):
+    # Buildenként egy jelölés: csak várakozás (egy stage sem futott), megszakadt (a szokásos
+    # idő töredéke), kiugró (valamely oszlop robusztus z-értéke a küszöb felett) vagy kézi.
+    # exclude mindig kizár, keep mindig megtart. Eredmény: maszk és a kizárt buildek magyarázata.
+    import pandas as pd
+
+    if stages is None:
+        stages = [c for c in df.columns if not c.startswith('_') and c != WAIT_OTHER]
+    build_ids = df['_BuildID'].astype(str).to_numpy()
+    totals = df['_Total'].to_numpy(dtype=np.float64)
+    durations = df[stages].to_numpy(dtype=np.float32) if stages else np.zeros((len(df), 0), np.float32)
+    stage_sum = durations.sum(axis=1, dtype=np.float64)
+    wait_other = np.maximum(totals - stage_sum, 0)
+
+    columns = ['_Total', WAIT_OTHER] + list(stages)
+    values = np.column_stack([totals, wait_other, durations]).astype(np.float32)
+    median, mad = rolling_median_mad(values, window)
+    # Egy véletlenül szoros ablak MAD-ja ne tegyen kiugróvá egy szokványos buildet: a skála
+    # legalább a teljes történet MAD-jának a fele
+    global_mad = np.median(np.abs(values - np.median(values, axis=0)), axis=0) if len(values) else 0
+    scale = np.maximum(_MAD_TO_SIGMA * np.maximum(mad, 0.5 * global_mad), min_scale)
+    excess = values - median
+    z = excess / scale
+    anomalous_cols = (z > threshold) & (excess > min_share * median[:, :1])
+    if min(window, len(df)) < MIN_WINDOW:
+        anomalous_cols[:] = False
+
+    queued = stage_sum == 0
+    aborted = ~queued & (totals < ABORTED_FRACTION * median[:, 0])
+    anomalous = ~queued & ~aborted & anomalous_cols.any(axis=1)
+    manual = np.isin(build_ids, [str(b) for b in exclude])
+    forced = np.isin(build_ids, [str(b) for b in keep])
+    excluded = manual | ((queued | aborted | anomalous) & ~forced)
+
+    rows = []
+    for i in np.flatnonzero(excluded):
+        if manual[i]:
+            reason, detail = MANUAL, ""
+        elif queued[i]:
+            reason, detail = QUEUED, f"{totals[i]:.1f} s, egy stage sem futott"
+        elif aborted[i]:
+            reason, detail = ABORTED, f"{totals[i]:.1f} s, a szokásos {median[i, 0]:.1f} s töredéke"
+        else:
+            reason = ANOMALOUS
+            hits = np.flatnonzero(anomalous_cols[i])
+            hits = hits[np.argsort(-z[i, hits])][:3]
+            detail = "; ".join(f"{columns[c]} {values[i, c]:.1f} s (medián {median[i, c]:.1f} s, z={z[i, c]:.1f})"
+                               for c in hits)
+        rows.append({'_BuildID': build_ids[i], '_Total': totals[i], 'Ok': reason, 'Részletek': detail})
+    report = pd.DataFrame(rows, columns=['_BuildID', '_Total', 'Ok', 'Részletek'])
+    return ~excluded, report
+
+
+def filter_outliers(df, label, stages=None, exclude=(), keep=(), **kwargs):
+    # A kizárt buildek nélküli tábla (új indexszel) és a magyarázat
+    mask, report = detect_outliers(df, stages, exclude=list(exclude) + EXCLUDE_BUILDS, keep=keep, **kwargs)
+    report.insert(0, '_Job', label)
+    return df[mask].reset_index(drop=True), report
+
+
+def print_outlier_report(report, total_builds=None):
+    if report.empty:
+        print("\n✓ Nincs kizárt build")
+        return
+    suffix = f" / {total_builds}" if total_builds is not None else ""
+    print(f"\nKizárt buildek: {len(report)}{suffix}")
+    print(f"{'Job':<12} {'Build':>7} {'Total (s)':>10}  {'Ok':<15} Részletek")
+    print("-" * 90)
+    for job, build_id, total, reason, detail in zip(report['_Job'], report['_BuildID'], report['_Total'],
+                                                   report['Ok'], report['Részletek']):
+        print(f"{job[:12]:<12} {'#' + build_id:>7} {total:>10.1f}  {reason:<15} {detail}")
@@ -0,0 +1,143 @@
+import os
+
+import numpy as np
+
+from jenkins_fetch import get_json
+
+# Ennyi eltérés fér bele két build indulása között időalapú párosításnál
+PAIR_TOLERANCE_S = float(os.getenv("JENKINS_PAIR_TOLERANCE_S", "900"))
+REVISION_TREE = "allBuilds[number,actions[lastBuiltRevision[SHA1]]]"
+
+
+def fetch_revisions(job_url, user, token, limit=None):
+    # build_id -> commit SHA a Git plugin lastBuiltRevision adataiból, egyetlen kérésben
+    tree = REVISION_TREE if limit is None else f"{REVISION_TREE}{{0,{limit}}}"
+    data = get_json(f"{job_url.rstrip('/')}/api/json", user, token, params={'tree': tree})
+    revisions = {}
+    for build in data.get('allBuilds', []):
+        for action in build.get('actions') or []:
+            sha = ((action or {}).get('lastBuiltRevision') or {}).get('SHA1')
+            if sha:
+                revisions[build['number']] = sha
+                break
+    return revisions
+
+
+def _match_revisions(old_ids, old_revs, new_ids, new_revs):
+    # Hash join a revízión; ugyanazon commit több buildje indulási sorrendben párosul (k. a k.-kal)
+    import pandas as pd
+
+    old = pd.DataFrame({'old': old_ids, 'rev': old_revs}).dropna()
+    new = pd.DataFrame({'new': new_ids, 'rev': new_revs}).dropna()
+    old['k'] = old.groupby('rev').cumcount()
+    new['k'] = new.groupby('rev').cumcount()
+    merged = old.merge(new, on=['rev', 'k'])
+    return merged['old'].to_numpy(dtype=np.int64), merged['new'].to_numpy(dtype=np.int64)
+
+
+def _match_nearest(old_start, new_start, tolerance_ms):
+    # Mohó párosítás távolság szerint, O(n log n): a két oldal egyesített, indulás szerint rendezett
+    # sorában a legközelebbi ellentétes oldali pár mindig szomszédos. Kupacban a szomszédos régi-új
+    # párok; a legközelebbi párosul, kiesik a sorból, és a két új szomszédja lesz jelölt.
+    import heapq
+
+    starts = np.concatenate([old_start, new_start]).astype(np.int64)
+    is_new = np.concatenate([np.zeros(len(old_start), dtype=bool), np.ones(len(new_start), dtype=bool)])
+    order = np.lexsort((is_new, starts))
+    starts = starts[order].tolist()
+    is_new = is_new[order].tolist()
+    n = len(starts)
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    alive = [True] * n
+
+    heap = [(starts[i + 1] - starts[i], i, i + 1) for i in range(n - 1)
+            if is_new[i] != is_new[i + 1] and starts[i + 1] - starts[i] <= tolerance_ms]
+    heapq.heapify(heap)
+    pairs = []
+    while heap:
+        _, i, j = heapq.heappop(heap)
+        if not (alive[i] and alive[j]):
+            continue
+        alive[i] = alive[j] = False
+        pairs.append((i, j))
+        left, right = prev[i], nxt[j]
+        if left >= 0:
+            nxt[left] = right
+        if right < n:
+            prev[right] = left
+        if left >= 0 and right < n and is_new[left] != is_new[right] \
+                and starts[right] - starts[left] <= tolerance_ms:
+            heapq.heappush(heap, (starts[right] - starts[left], left, right))
+
+    if not pairs:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    first, second = (order[list(side)] for side in zip(*pairs))
+    new_first = first >= len(old_start)
+    pos_old = np.where(new_first, second, first)
+    pos_new = np.where(new_first, first, second) - len(old_start)
+    return pos_old.astype(np.int64), pos_new.astype(np.int64)
+
+
+def pair_builds(df_regi, df_uj, tolerance_s=None, revisions_regi=None, revisions_uj=None):
+    # Először SCM revízió szerint (ha mindkét oldalon ismert), a maradékot a legközelebbi
+    # indulási idő szerint. Eredmény: a párok táblája a régi build indulása szerint rendezve,
+    # valamint a párosítatlan régi és új build számok.
+    import pandas as pd
+
+    if tolerance_s is None:
+        tolerance_s = PAIR_TOLERANCE_S
+    ids_regi = df_regi['_BuildID'].astype(int).to_numpy()
+    ids_uj = df_uj['_BuildID'].astype(int).to_numpy()
+    start_regi = df_regi['_StartMs'].to_numpy(dtype=np.int64)
+    start_uj = df_uj['_StartMs'].to_numpy(dtype=np.int64)
+
+    pos_old = np.zeros(0, dtype=np.int64)
+    pos_new = np.zeros(0, dtype=np.int64)
+    if revisions_regi and revisions_uj:
+        order_regi = np.argsort(start_regi, kind='stable')
+        order_uj = np.argsort(start_uj, kind='stable')
+        pos_old, pos_new = _match_revisions(
+            order_regi, [revisions_regi.get(i) for i in ids_regi[order_regi]],
+            order_uj, [revisions_uj.get(i) for i in ids_uj[order_uj]])
+    n_revision = len(pos_old)
+
+    rest_old = np.setdiff1d(np.arange(len(ids_regi)), pos_old)
+    rest_new = np.setdiff1d(np.arange(len(ids_uj)), pos_new)
+    near_old, near_new = _match_nearest(start_regi[rest_old], start_uj[rest_new], tolerance_s * 1000)
+    pos_old = np.concatenate([pos_old, rest_old[near_old]])
+    pos_new = np.concatenate([pos_new, rest_new[near_new]])
+
+    pairs = pd.DataFrame({
+        'old_pos': pos_old,
+        'new_pos': pos_new,
+        'old_id': ids_regi[pos_old],
+        'new_id': ids_uj[pos_new],
+        'method': ['revision'] * n_revision + ['time'] * (len(pos_old) - n_revision),
+        'delta_s': (start_uj[pos_new] - start_regi[pos_old]) / 1000,
+    })
+    pairs = pairs.iloc[np.argsort(start_regi[pos_old], kind='stable')].reset_index(drop=True)
+    unmatched_regi = np.sort(ids_regi[np.setdiff1d(np.arange(len(ids_regi)), pos_old)]).tolist()
+    unmatched_uj = np.sort(ids_uj[np.setdiff1d(np.arange(len(ids_uj)), pos_new)]).tolist()
+    return pairs, unmatched_regi, unmatched_uj
+
+
+def paired_frames(df_regi, df_uj, pairs):
+    # A két tábla sorai a párok sorrendjében, így az index szerinti riportok változatlanul működnek
+    return (df_regi.iloc[pairs['old_pos'].to_numpy()].reset_index(drop=True),
+            df_uj.iloc[pairs['new_pos'].to_numpy()].reset_index(drop=True))
+
+
+def print_pairing_summary(pairs, unmatched_regi, unmatched_uj):
+    by_method = pairs['method'].value_counts()
+    print(f"\n✓ {len(pairs)} build pár ({by_method.get('revision', 0)} revízió, "
+          f"{by_method.get('time', 0)} indulási idő alapján)")
+    if len(pairs):
+        print(f"  Indulási eltérés: medián {pairs['delta_s'].abs().median():.0f}s, "
+              f"max {pairs['delta_s'].abs().max():.0f}s")
+    if unmatched_regi:
+        print(f"  Pár nélkül (régi): {len(unmatched_regi)} build, pl. "
+              + ", ".join(f"#{i}" for i in unmatched_regi[:10]))
+    if unmatched_uj:
+        print(f"  Pár nélkül (új): {len(unmatched_uj)} build, pl. "
+              + ", ".join(f"#{i}" for i in unmatched_uj[:10]))
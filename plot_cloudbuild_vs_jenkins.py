@@ -1,49 +1,56 @@
-import matplotlib.pyplot as plt
-import numpy as np
-
-builds = ['#908', '#909', '#910', '#911', '#912']
-# Jenkins idők (másodpercben)
-# #908: 5m 10s = 310s
-# #909: 5m 6s = 306s
-# #910: 4m 51s = 291s
-# #911: 8m 0s = 480s
-# #912: 8m 2s = 482s
-jenkins_times = [310, 306, 291, 480, 482]
-
-# Cloud Build idők (másodpercben)
-# #908 -> 62a29768: 3m 40s = 220s
-# #909 -> 9c03818f: 3m 36s = 216s
-# #910 -> 741f53e0: 3m 34s = 214s
-# #911 -> f3683610: 6m 31s = 391s
-# #912 -> 09ff11fe: 6m 33s = 393s
-cloudbuild_times = [220, 216, 214, 391, 393]
-
-x = np.arange(len(builds))
-
-fig, ax = plt.subplots(figsize=(10, 6))
-
-ax.plot(x, jenkins_times, marker='o', linestyle='-', linewidth=2, label='Jenkins Build Time', color='#1f77b4')
-ax.plot(x, cloudbuild_times, marker='s', linestyle='-', linewidth=2, label='Cloud Build Time', color='#ff7f0e')
-
-for i, txt in enumerate(jenkins_times):
-    ax.annotate(f"{txt}s", (x[i], jenkins_times[i]), textcoords="offset points", xytext=(0,10), ha='center', color='#1f77b4', fontweight='bold')
-
-for i, txt in enumerate(cloudbuild_times):
-    ax.annotate(f"{txt}s", (x[i], cloudbuild_times[i]), textcoords="offset points", xytext=(0,-15), ha='center', color='#ff7f0e', fontweight='bold')
-
-line_pos = 2.5 
-ax.axvline(x=line_pos, color='red', linestyle='--', linewidth=1.5)
-
-ax.text(line_pos - 0.1, max(max(jenkins_times), max(cloudbuild_times)) * 0.9, 
-        'remote cache letiltása', color='red', rotation=0, fontweight='bold', ha='right')
-
-ax.set_xticks(x)
-ax.set_xticklabels(builds)
-ax.set_xlabel('Build Sorszám', fontsize=12, fontweight='bold')
-ax.set_ylabel('Időtartam (másodperc)', fontsize=12, fontweight='bold')
-ax.set_title('Jenkins vs Cloud Build Idők', fontsize=14, fontweight='bold')
-ax.grid(True, linestyle='--', alpha=0.5)
-ax.legend()
-
-plt.tight_layout()
-plt.show()
+import os
+from dotenv import load_dotenv
+
+from build_store import default_store
+from cloudbuild import (CLOUDBUILD_DIR, CLOUDBUILD_STAGE, join_cloudbuild, load_cloudbuild_frame,
+                        plot_cloudbuild_series, print_cloudbuild_summary, read_build_map, series_columns)
+from export import output_name, write_frames
+from harvester import harvest_job
+from jenkins_fetch import job_key
+from profiler import phase, profile_from_argv
+
+load_dotenv()
+profile_from_argv()
+
+JENKINS_NEW_URL = os.getenv("JENKINS_NEW_URL", "http://10.110.0.22:8080")
+
+url_base = f"{JENKINS_NEW_URL}/view/%20%20test-environments/job/test-environments/job/abomination-core/job/build-image"
+USER = os.getenv("JENKINS_USER")
+TOKEN = os.getenv("JENKINS_TOKEN_NEW")
+
+# A Cloud Build exportok helye: gcloud builds list --format=json > cloudbuild_exports/builds.json
+CLOUDBUILD_PATHS = [CLOUDBUILD_DIR]
+# A build szám substitution előtti buildek kézi párosítása, soronként pl. "#908 -> 62a29768"
+BUILD_MAP_FILE = "cloudbuild_map.txt"
+# Ennyi legutóbbi Jenkins build kerül a diagramra (None = mind)
+LAST_N = None
+
+# Függőleges jelölés az adott build elé
+EVENTS = {
+    '911': 'remote cache letiltása',
+}
+
+with phase('fetch'):
+    store = default_store()
+    harvest_job(url_base, USER, TOKEN, "build-image", store)
+    df_jenkins = store.load_frame(*job_key(url_base), "Jenkins", last_n=LAST_N)
+
+with phase('cloudbuild'):
+    build_map = read_build_map(BUILD_MAP_FILE) if os.path.exists(BUILD_MAP_FILE) else None
+    df_cloudbuild = load_cloudbuild_frame(CLOUDBUILD_PATHS, build_map)
+    print(f"  {len(df_cloudbuild)} Cloud Build rekord beolvasva")
+
+if df_jenkins.empty or df_cloudbuild.empty:
+    print("\nHIBA: Nincs Jenkins build vagy Cloud Build rekord.")
+    exit()
+
+series, unmatched_jenkins, unmatched_cloudbuild = join_cloudbuild(df_jenkins, df_cloudbuild, CLOUDBUILD_STAGE)
+print_cloudbuild_summary(series, unmatched_jenkins, unmatched_cloudbuild)
+if series.empty:
+    exit()
+
+csv_filename = output_name("cloudbuild_vs_jenkins.csv")
+write_frames([series], csv_filename, series_columns(series))
+print(f"✓ Mentés sikeres: {csv_filename}")
+
+plot_cloudbuild_series(series, 'Jenkins vs Cloud Build Idők', EVENTS)
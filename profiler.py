@@ -0,0 +1,257 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Beépített fázis profilozás külső profiler nélkül: --profile kapcsoló (scriptek és CLI) vagy
+# JENKINS_PROFILE=<fájl>. Csak a standard könyvtárat használja, a fetch út indulását nem lassítja.
+PROFILE_OUTPUT = os.getenv("JENKINS_PROFILE")
+# json: összesítés + események, chrome: chrome://tracing / Perfetto formátum
+PROFILE_FORMAT = os.getenv("JENKINS_PROFILE_FORMAT", "json")
+PROFILE_MEMORY = os.getenv("JENKINS_PROFILE_MEMORY", "0") == "1"
+DEFAULT_OUTPUT = "jenkins_profile.json"
+MEMORY_TOP = 15
+
+_NULL = nullcontext()
+_active = None
+
+
+class Profiler:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.events = []
+        self.http = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._started = time.time()
+        if memory:
+            import tracemalloc
+            tracemalloc.start()
+
+    def _now_us(self):
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def phase(self, name, **args):
+        # Egymásba ágyazható fázis; memória módban a fázis alatti nettó foglalás és csúcs is
+        # (a csúcsot a belső fázisok kilépéskor felfelé adják tovább)
+        stack = self._stack()
+        frame = {'peak': 0, 'start_mem': 0, 'child_us': 0.0}
+        if self.memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['start_mem'] = current
+        stack.append(frame)
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            duration = self._now_us() - start
+            stack.pop()
+            if stack:
+                stack[-1]['child_us'] += duration
+            if self.memory:
+                import tracemalloc
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(frame['peak'], peak)
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+                args = dict(args, mem_delta=current - frame['start_mem'], mem_peak=peak - frame['start_mem'])
+            self._add('phase', name, start, duration, args, duration - frame['child_us'])
+
+    def record_phase(self, name, start_us, duration_us, **args):
+        # Utólag, összesítve mért fázis (pl. egy stream összes socket olvasása); a futó fázis
+        # saját idejéből levonódik, mint egy beágyazott fázisé
+        stack = self._stack()
+        if stack:
+            stack[-1]['child_us'] += duration_us
+        self._add('phase', name, start_us, duration_us, args)
+
+    def _add(self, cat, name, start_us, duration_us, args, self_us=None):
+        event = {'cat': cat, 'name': name, 'ts': round(start_us, 1), 'dur': round(duration_us, 1),
+                 'self': round(duration_us if self_us is None else self_us, 1),
+                 'tid': threading.get_native_id(), 'args': args}
+        with self._lock:
+            self.events.append(event)
+
+    def record_http(self, controller, url, status, wire_bytes, body_bytes, latency_s, elapsed_s):
+        # latency: a válasz fejlécéig eltelt idő; elapsed: a teljes kérés a törzs beolvasásával
+        end = self._now_us()
+        self._add('http', controller, end - elapsed_s * 1e6, elapsed_s * 1e6,
+                  {'url': url, 'status': status, 'wire_bytes': wire_bytes, 'body_bytes': body_bytes,
+                   'latency_ms': round(latency_s * 1000, 2)})
+        with self._lock:
+            stats = self.http.get(controller)
+            if stats is None:
+                stats = self.http[controller] = {'requests': 0, 'errors': 0, 'wire_bytes': 0, 'body_bytes': 0,
+                                                 'latency_s': 0.0, 'max_latency_s': 0.0, 'elapsed_s': 0.0}
+            stats['requests'] += 1
+            stats['errors'] += status >= 400
+            stats['wire_bytes'] += wire_bytes
+            stats['body_bytes'] += body_bytes
+            stats['latency_s'] += latency_s
+            stats['max_latency_s'] = max(stats['max_latency_s'], latency_s)
+            stats['elapsed_s'] += elapsed_s
+
+    def phase_summary(self):
+        summary = {}
+        for event in self.events:
+            if event['cat'] != 'phase':
+                continue
+            s = summary.get(event['name'])
+            if s is None:
+                s = summary[event['name']] = {'count': 0, 'total_ms': 0.0, 'self_ms': 0.0, 'max_ms': 0.0}
+            ms = event['dur'] / 1000
+            s['count'] += 1
+            s['total_ms'] += ms
+            s['self_ms'] += event['self'] / 1000
+            s['max_ms'] = max(s['max_ms'], ms)
+            if 'mem_peak' in event['args']:
+                s['mem_peak'] = max(s.get('mem_peak', 0), event['args']['mem_peak'])
+                s['mem_delta'] = s.get('mem_delta', 0) + event['args']['mem_delta']
+        return summary
+
+    def memory_top(self, limit=MEMORY_TOP):
+        if not self.memory:
+            return []
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return []
+        stats = tracemalloc.take_snapshot().statistics('lineno')[:limit]
+        return [{'where': f"{s.traceback[0].filename}:{s.traceback[0].lineno}", 'bytes': s.size, 'count': s.count}
+                for s in stats]
+
+    def report(self):
+        return {
+            'argv': sys.argv,
+            'pid': os.getpid(),
+            'started': self._started,
+            'wall_s': round(time.perf_counter() - self._origin, 4),
+            'phases': self.phase_summary(),
+            'http': self.http,
+            'memory_top': self.memory_top(),
+            'events': self.events,
+        }
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = [{'name': e['name'], 'cat': e['cat'], 'ph': 'X', 'ts': e['ts'], 'dur': e['dur'], 'pid': pid,
+                   'tid': e['tid'], 'args': e['args']} for e in self.events]
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': ' '.join(sys.argv)}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, filename, fmt=PROFILE_FORMAT):
+        payload = self.chrome_trace() if fmt == 'chrome' else self.report()
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+
+    def print_summary(self):
+        summary = self.phase_summary()
+        print(f"\n{'Fázis':<28} {'Hívás':>6} {'Összesen (ms)':>14} {'Saját (ms)':>11} {'Max (ms)':>10}"
+              + (f" {'Csúcs mem. (MB)':>16}" if self.memory else ''))
+        print("-" * (74 + (17 if self.memory else 0)))
+        for name, s in sorted(summary.items(), key=lambda item: -item[1]['total_ms']):
+            line = (f"{name[:28]:<28} {s['count']:>6} {s['total_ms']:>14.1f} {s['self_ms']:>11.1f} "
+                    f"{s['max_ms']:>10.1f}")
+            if self.memory:
+                line += f" {s.get('mem_peak', 0) / 2**20:>16.1f}"
+            print(line)
+        if self.http:
+            print(f"\n{'Controller':<40} {'Kérés':>6} {'Hiba':>5} {'Átvitt (KB)':>12} {'Átl. késl. (ms)':>16} "
+                  f"{'Max (ms)':>9}")
+            for controller, s in sorted(self.http.items()):
+                print(f"{controller:<40} {s['requests']:>6} {s['errors']:>5} {s['wire_bytes'] / 1024:>12.1f} "
+                      f"{s['latency_s'] / s['requests'] * 1000:>16.1f} {s['max_latency_s'] * 1000:>9.1f}")
+
+
+def enable(memory=PROFILE_MEMORY):
+    global _active
+    if _active is None:
+        _active = Profiler(memory)
+    return _active
+
+
+def active():
+    return _active
+
+
+def phase(name, **args):
+    return _active.phase(name, **args) if _active is not None else _NULL
+
+
+def record_phase(name, start_s, duration_s, **args):
+    # start_s: time.perf_counter() érték
+    if _active is not None:
+        _active.record_phase(name, (start_s - _active._origin) * 1e6, duration_s * 1e6, **args)
+
+
+def profiled(name):
+    # Függvény dekorátor: profilozás nélkül egyetlen None ellenőrzés a költsége
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_http(controller, url, status, wire_bytes, body_bytes, latency_s, elapsed_s):
+    if _active is not None:
+        _active.record_http(controller, url, status, wire_bytes, body_bytes, latency_s, elapsed_s)
+
+
+def finish(output=None, fmt=None):
+    # A trace kiírása és az összesítő táblák; a profilozás ezután kikapcsol
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return None
+    output = output or PROFILE_OUTPUT or DEFAULT_OUTPUT
+    profiler.write(output, fmt or PROFILE_FORMAT)
+    profiler.print_summary()
+    print(f"✓ Profil mentve: {output}")
+    return profiler
+
+
+def profile_from_argv(argv=None):
+    # A scriptekhez: --profile[=fájl], --profile-memory, --profile-format=chrome kivétele az
+    # argumentumok közül; a trace a program végén íródik ki
+    argv = sys.argv if argv is None else argv
+    output = PROFILE_OUTPUT
+    fmt = PROFILE_FORMAT
+    memory = PROFILE_MEMORY
+    requested = output is not None
+    for arg in list(argv[1:]):
+        if arg == '--profile' or arg.startswith('--profile='):
+            requested = True
+            output = arg.partition('=')[2] or output
+        elif arg == '--profile-memory':
+            requested = memory = True
+        elif arg.startswith('--profile-format='):
+            requested = True
+            fmt = arg.partition('=')[2]
+        else:
+            continue
+        argv.remove(arg)
+    if not requested:
+        return None
+    profiler = enable(memory)
+    atexit.register(finish, output, fmt)
+    return profiler
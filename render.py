@@ -0,0 +1,82 @@
+import math
+import os
+
+import matplotlib
+import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import to_rgba
+
+from profiler import profiled
+
+# Ha meg van adva, a diagram fájlba kerül (PNG/SVG/PDF a kiterjesztés alapján), ablak nélkül
+PLOT_OUTPUT = os.getenv("JENKINS_PLOT_OUTPUT")
+# Ennyi build felett a feliratokat ritkítjuk
+LABEL_THRESHOLD = int(os.getenv("JENKINS_LABEL_THRESHOLD", "40"))
+
+
+if PLOT_OUTPUT:
+    matplotlib.use('Agg')
+
+
+def label_step(n, threshold=LABEL_THRESHOLD):
+    return max(1, math.ceil(n / threshold)) if threshold else 1
+
+
+def draw_stacked_bars(ax, x, values, width, colors, alpha=0.9):
+    # Egy job összes stage-e egyetlen PolyCollection-ként: values egy build × stage mátrix,
+    # az oszlopok alja a soronkénti kumulált összeg
+    values = np.asarray(values, dtype=np.float64)
+    n, s = values.shape
+    if n == 0 or s == 0:
+        return None
+    tops = np.cumsum(values, axis=1)
+    bottoms = tops - values
+    left = np.repeat(np.asarray(x, dtype=np.float64) - width / 2, s)
+    right = left + width
+    bottom = bottoms.ravel()
+    top = tops.ravel()
+
+    verts = np.empty((n * s, 4, 2))
+    verts[:, 0, 0] = left
+    verts[:, 0, 1] = bottom
+    verts[:, 1, 0] = left
+    verts[:, 1, 1] = top
+    verts[:, 2, 0] = right
+    verts[:, 2, 1] = top
+    verts[:, 3, 0] = right
+    verts[:, 3, 1] = bottom
+
+    facecolors = np.tile(np.array([to_rgba(c) for c in colors]), (n, 1))
+    collection = PolyCollection(verts, facecolors=facecolors, edgecolors='white',
+                                linewidths=0.5 if n <= LABEL_THRESHOLD else 0, alpha=alpha)
+    collection.sticky_edges.y.append(0)
+    ax.add_collection(collection, autolim=True)
+    ax.autoscale_view()
+    return collection
+
+
+def draw_total_labels(ax, x, totals, threshold=LABEL_THRESHOLD, **text_kwargs):
+    # Sok build esetén csak minden k-adik oszlop kap feliratot
+    step = label_step(len(totals), threshold)
+    kwargs = dict(ha='center', va='bottom', fontsize=9, fontweight='bold')
+    kwargs.update(text_kwargs)
+    for i in range(0, len(totals), step):
+        ax.text(x[i], totals[i], f'{totals[i]:.0f}s', **kwargs)
+
+
+def set_build_xticks(ax, x, labels, threshold=LABEL_THRESHOLD, **label_kwargs):
+    step = label_step(len(labels), threshold)
+    ax.set_xticks(x[::step])
+    ax.set_xticklabels(list(labels)[::step], **label_kwargs)
+
+
+@profiled('save')
+def save_or_show(fig, output=PLOT_OUTPUT):
+    import matplotlib.pyplot as plt
+
+    if output:
+        fig.savefig(output, dpi=150, bbox_inches='tight')
+        plt.close(fig)
+        print(f"✓ Diagram mentve: {output}")
+    else:
+        plt.show()
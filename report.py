@@ -0,0 +1,123 @@
+import numpy as np
+
+from profiler import profiled
+from stage_matrix import align_stage_frames
+
+PREFERRED_ORDER = [
+    'Wait/Other',
+    'Init',
+    'Declarative: Checkout SCM',
+    'Git clone',
+    'Checkout',
+    'Build',
+    'Build & Push (Google Cloud Build)',
+    'Push image',
+    'Test',
+    'Declarative: Post Actions'
+]
+
+COLOR_MAP = {
+    'Wait/Other': '#d3d3d3',
+    'Init': '#c7c7c7',
+    'Declarative: Checkout SCM': '#98df8a',
+    'Git clone': '#2ca02c',
+    'Checkout': '#2ca02c',
+    'Build': '#1f77b4',
+    'Build & Push (Google Cloud Build)': '#1f77b4',
+    'Push image': '#aec7e8',
+    'Test': '#ff7f0e',
+    'Declarative: Post Actions': '#9467bd'
+}
+
+
+def prepare_comparison(df_regi, df_uj, last_n=None, preferred_order=PREFERRED_ORDER):
+    # Közös stage-ek, Wait/Other, és az index szerint párosítható utolsó N build
+    (df_regi, df_uj), all_stages = align_stage_frames([df_regi, df_uj], preferred_order)
+    max_builds = min(len(df_regi), len(df_uj))
+    if last_n is not None:
+        max_builds = min(max_builds, last_n)
+    df_regi = df_regi.tail(max_builds).reset_index(drop=True)
+    df_uj = df_uj.tail(max_builds).reset_index(drop=True)
+    return df_regi, df_uj, all_stages
+
+
+def stage_colors(all_stages, color_map=COLOR_MAP):
+    import matplotlib.pyplot as plt
+
+    default_colors = plt.cm.tab20(np.linspace(0, 1, len(all_stages)))
+    return [color_map.get(stage, default_colors[i]) for i, stage in enumerate(all_stages)]
+
+
+@profiled('plot')
+def plot_comparison(df_regi, df_uj, all_stages, title, output=None, color_map=COLOR_MAP, xtick_labels=None,
+                    xlabel='Build Párok (Régi vs Új)', **tick_kwargs):
+    # Alapból "#régi vs #új" feliratok; a tick_kwargs a set_build_xticks-nek megy tovább
+    import matplotlib.pyplot as plt
+
+    from render import PLOT_OUTPUT, draw_stacked_bars, draw_total_labels, save_or_show, set_build_xticks
+
+    max_builds = len(df_regi)
+    x = np.arange(max_builds)
+    width = 0.4
+    colors = stage_colors(all_stages, color_map)
+
+    fig, ax = plt.subplots(figsize=(16, 8))
+    draw_stacked_bars(ax, x - width/2, df_regi[all_stages].to_numpy(), width, colors)
+    draw_stacked_bars(ax, x + width/2, df_uj[all_stages].to_numpy(), width, colors)
+    draw_total_labels(ax, x - width/2, df_regi['_Total'].to_numpy(), color='black')
+    draw_total_labels(ax, x + width/2, df_uj['_Total'].to_numpy(), color='black')
+
+    if xtick_labels is None:
+        xtick_labels = [f"#{r} vs #{u}" for r, u in zip(df_regi['_BuildID'], df_uj['_BuildID'])]
+    tick_kwargs.setdefault('rotation', 45 if max_builds > 8 else 0)
+    set_build_xticks(ax, x, xtick_labels, **tick_kwargs)
+    ax.set_xlabel(xlabel, fontsize=12, fontweight='bold')
+    ax.set_ylabel('Időtartam (másodperc)', fontsize=12, fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.grid(axis='y', linestyle='--', alpha=0.5)
+
+    handles = [plt.Rectangle((0, 0), 1, 1, fc=c, alpha=0.9) for c in colors]
+    ax.legend(handles, all_stages, title='Stages', loc='upper left', bbox_to_anchor=(1, 1), fontsize=10)
+
+    plt.tight_layout()
+    save_or_show(fig, output or PLOT_OUTPUT)
+
+
+@profiled('tables')
+def print_build_table(df_regi, df_uj):
+    print("\n" + "="*90)
+    print("BUILD-ENKÉNTI RÉSZLETEK:")
+    print("="*90)
+    print(f"{'Build (R vs Ú)':<20} {'Régi Total (s)':<18} {'Új Total (s)':<18} {'Különbség':<15} {'%'}")
+    print("-"*90)
+    totals_regi = df_regi['_Total'].to_numpy()
+    totals_uj = df_uj['_Total'].to_numpy()
+    for build_regi, build_uj, total_regi, total_uj in zip(
+            df_regi['_BuildID'], df_uj['_BuildID'], totals_regi, totals_uj):
+        diff = total_uj - total_regi
+        pct = (diff / total_regi * 100) if total_regi > 0 else 0
+
+        symbol = "gyorsabb" if diff < 0 else "lassabb" if diff > 0 else "ugyanaz"
+        build_label = f"#{build_regi} vs #{build_uj}"
+        print(f"{build_label:<20} {total_regi:<18.1f} {total_uj:<18.1f} {diff:<15.1f} {pct:+.1f}% ({symbol})")
+
+
+@profiled('tables')
+def print_stage_averages(df_regi, df_uj, all_stages):
+    print("\n" + "="*90)
+    print("STAGE-ENKÉNTI ÁTLAG IDŐTARTAMOK:")
+    print("="*90)
+    print(f"{'Stage':<25} {'Régi Átlag (s)':<20} {'Új Átlag (s)':<20} {'Különbség'}")
+    print("-"*90)
+    avg_regi = df_regi[all_stages].mean()
+    avg_uj = df_uj[all_stages].mean()
+    for stage in all_stages:
+        diff = avg_uj[stage] - avg_regi[stage]
+        print(f"{stage:<25} {avg_regi[stage]:<20.2f} {avg_uj[stage]:<20.2f} {diff:+.2f}s")
+
+
+def export_comparison_csv(df_regi, df_uj, all_stages, csv_filename, spreadsheet=True):
+    # A két tábla egymás után kerül a fájlba; a formátumot a kiterjesztés adja (.csv, .csv.gz, .parquet, ...)
+    from export import comparison_columns, write_frames
+
+    write_frames([df_regi, df_uj], csv_filename, comparison_columns(df_regi, df_uj, all_stages), spreadsheet)
@@ -0,0 +1,263 @@
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from profiler import profiled
+
+WAIT_OTHER = 'Wait/Other'
+
+
+class StageMatrix:
+    # build × stage időtartam mátrix (másodperc, float32), soronként egy build
+    __slots__ = ('build_ids', 'totals', 'start_ms', 'stage_names', 'durations')
+
+    def __init__(self, build_ids, totals, start_ms, stage_names, durations):
+        self.build_ids = build_ids
+        self.totals = totals
+        self.start_ms = start_ms
+        self.stage_names = stage_names
+        self.durations = durations
+
+    def __len__(self):
+        return len(self.build_ids)
+
+    def reversed(self):
+        return StageMatrix(self.build_ids[::-1], self.totals[::-1], self.start_ms[::-1],
+                           self.stage_names, self.durations[::-1])
+
+    def writable(self):
+        # Csak olvasható (pl. memmap) tömbök helyett írható másolatok; ha mind írható, önmaga
+        arrays = [self.totals, self.start_ms, self.durations]
+        if all(a.flags.writeable for a in arrays):
+            return self
+        totals, start_ms, durations = (a if a.flags.writeable else np.array(a) for a in arrays)
+        return StageMatrix(self.build_ids, totals, start_ms, self.stage_names, durations)
+
+    def stage_sum(self):
+        return self.durations.sum(axis=1, dtype=np.float64)
+
+    def wait_other(self):
+        return np.maximum(self.totals - self.stage_sum(), 0)
+
+
+class StageTable:
+    # Internált stage nevek: név -> egész azonosító, az azonosító egyben oszlop index
+    __slots__ = ('names', 'index')
+
+    def __init__(self, names=()):
+        self.names = []
+        self.index = {}
+        for name in names:
+            self.intern(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        stage_id = self.index.get(name)
+        if stage_id is None:
+            stage_id = len(self.names)
+            name = sys.intern(name)
+            self.names.append(name)
+            self.index[name] = stage_id
+        return stage_id
+
+
+class BuildRecord:
+    # Egy build kompakt nézete: metaadatok slotokban, a stage-ek a közös tömbök szeletei
+    __slots__ = ('build_id', 'start_ms', 'total_ms', 'stage_ids', 'durations_ms', 'table')
+
+    def __init__(self, build_id, start_ms, total_ms, stage_ids, durations_ms, table):
+        self.build_id = build_id
+        self.start_ms = start_ms
+        self.total_ms = total_ms
+        self.stage_ids = stage_ids
+        self.durations_ms = durations_ms
+        self.table = table
+
+    def stages(self):
+        names = self.table.names
+        return {names[stage_id]: ms / 1000 for stage_id, ms in zip(self.stage_ids, self.durations_ms)}
+
+
+class BuildRecords:
+    # Sok build oszlopos, típusos tömbökben: buildenként 4 szám, stage-enként egy
+    # (stage_id, ms) pár 2 x 4 bájton, offszetekkel. A NumPy nézetek másolás nélkül készülnek,
+    # a stage nevek csak egyszer, a StageTable-ben léteznek.
+    __slots__ = ('table', 'build_ids', 'start_ms', 'total_ms', 'offsets', 'stage_ids', 'durations_ms')
+
+    def __init__(self, table=None):
+        self.table = table if table is not None else StageTable()
+        self.build_ids = array('q')
+        self.start_ms = array('q')
+        self.total_ms = array('q')
+        self.offsets = array('q', [0])
+        self.stage_ids = array('I')
+        self.durations_ms = array('I')
+
+    def __len__(self):
+        return len(self.build_ids)
+
+    def append(self, build):
+        intern = self.table.intern
+        self.build_ids.append(int(build['id']))
+        self.start_ms.append(build.get('startTimeMillis', 0) or 0)
+        self.total_ms.append(build.get('durationMillis', 0))
+        stages = build.get('stages', ())
+        for stage in stages:
+            self.stage_ids.append(intern(stage['name']))
+            self.durations_ms.append(stage['durationMillis'])
+        self.offsets.append(len(self.stage_ids))
+
+    def extend(self, builds):
+        for build in builds:
+            self.append(build)
+        return self
+
+    def __getitem__(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return BuildRecord(self.build_ids[i], self.start_ms[i], self.total_ms[i],
+                           memoryview(self.stage_ids)[start:end], memoryview(self.durations_ms)[start:end],
+                           self.table)
+
+    def to_numpy(self):
+        # Másolásmentes nézetek a tömbökre; a tömbök bővítése előtt el kell engedni őket
+        return {
+            'build_ids': np.frombuffer(self.build_ids, dtype=np.int64),
+            'start_ms': np.frombuffer(self.start_ms, dtype=np.int64),
+            'total_ms': np.frombuffer(self.total_ms, dtype=np.int64),
+            'offsets': np.frombuffer(self.offsets, dtype=np.int64),
+            'stage_ids': np.frombuffer(self.stage_ids, dtype=np.uint32),
+            'durations_ms': np.frombuffer(self.durations_ms, dtype=np.uint32),
+        }
+
+    def to_matrix(self):
+        # Sűrű build × stage mátrix; ez az egyetlen lépés, ami új memóriát foglal
+        views = self.to_numpy()
+        n = len(self)
+        durations = np.zeros((n, len(self.table)), dtype=np.float32)
+        rows = np.repeat(np.arange(n), np.diff(views['offsets']))
+        durations[rows, views['stage_ids']] = views['durations_ms'] / 1000
+        return StageMatrix([str(build_id) for build_id in self.build_ids], views['total_ms'] / 1000,
+                           views['start_ms'].copy(), list(self.table.names), durations)
+
+
+@profiled('matrix')
+def build_stage_matrix(builds, stage_index=None):
+    # Egyetlen menet a wfapi buildeken; a stage neveket internáljuk és oszlop indexet kapnak.
+    # Közös stage_index átadásával több job mátrixa ugyanazt az oszlopkiosztást használja.
+    # A builds lehet generátor is (pl. wfapi_stream), a buildeket nem tartjuk meg.
+    if stage_index is None:
+        stage_index = {}
+    build_ids = []
+    totals = array('d')
+    start_ms = array('q')
+    counts = array('q')
+    cols = array('q')
+    values = array('d')
+    index_get = stage_index.get
+    cols_append = cols.append
+    values_append = values.append
+
+    for build in builds:
+        build_ids.append(build.get('id', 'N/A'))
+        totals.append(build.get('durationMillis', 0))
+        start_ms.append(build.get('startTimeMillis', 0) or 0)
+        stages = build.get('stages', ())
+        counts.append(len(stages))
+        for stage in stages:
+            name = stage['name']
+            col = index_get(name)
+            if col is None:
+                col = len(stage_index)
+                stage_index[sys.intern(name)] = col
+            cols_append(col)
+            values_append(stage['durationMillis'])
+
+    n = len(build_ids)
+    durations = np.zeros((n, len(stage_index)), dtype=np.float32)
+    if values:
+        rows = np.repeat(np.arange(n), np.frombuffer(counts, dtype=np.int64))
+        durations[rows, np.frombuffer(cols, dtype=np.int64)] = np.frombuffer(values, dtype=np.float64) / 1000
+    totals = np.frombuffer(totals, dtype=np.float64) / 1000 if n else np.zeros(0)
+    start_ms = np.frombuffer(start_ms, dtype=np.int64).copy() if n else np.zeros(0, dtype=np.int64)
+    return StageMatrix(build_ids, totals, start_ms, list(stage_index), durations)
+
+
+def format_start_times(start_ms):
+    # '%Y-%m-%d\n%H:%M' helyi időben, vektorosan: a helyi eltolást óránként egyszer kérdezzük
+    # le, csak az időzóna váltást tartalmazó órák buildjeit buildenként; a formázás a NumPy-ban fut
+    start_ms = np.asarray(start_ms, dtype=np.int64)
+    if not len(start_ms):
+        return []
+    hours, inverse = np.unique(start_ms // 3_600_000, return_inverse=True)
+    inverse = inverse.ravel()
+    first = np.array([time.localtime(hour * 3600).tm_gmtoff for hour in hours.tolist()], dtype=np.int64)
+    last = np.array([time.localtime(hour * 3600 + 3599).tm_gmtoff for hour in hours.tolist()], dtype=np.int64)
+    offsets = first[inverse]
+    changing = np.flatnonzero((first != last)[inverse])
+    offsets[changing] = [time.localtime(ms // 1000).tm_gmtoff for ms in start_ms[changing].tolist()]
+    local = (start_ms + offsets * 1000).astype('datetime64[ms]')
+    labels = np.char.replace(np.datetime_as_string(local, unit='m'), 'T', '\n')
+    return np.where(start_ms != 0, labels, "N/A").tolist()
+
+
+@profiled('frame')
+def matrix_to_frame(matrix, job_label, with_time=False):
+    # Ugyanaz az oszlopkiosztás, mint a korábbi soronkénti dict -> DataFrame úton
+    import pandas as pd
+
+    meta = {
+        '_BuildID': matrix.build_ids,
+        '_Total': matrix.totals,
+        '_Job': job_label,
+        '_StartMs': matrix.start_ms,
+    }
+    if with_time:
+        meta['_Time'] = format_start_times(matrix.start_ms)
+    # A stage blokk a mátrix nézete marad (copy=False), a meta oszlopok elé kerülnek
+    df = pd.DataFrame(matrix.durations, columns=matrix.stage_names, copy=False)
+    for i, (name, values) in enumerate(meta.items()):
+        df.insert(i, name, values)
+    return df
+
+
+def order_stages(stage_names, preferred_order):
+    remaining = set(stage_names)
+    remaining.discard(WAIT_OTHER)
+    ordered = []
+    for stage in preferred_order:
+        if stage in remaining:
+            ordered.append(stage)
+            remaining.remove(stage)
+    ordered.extend(sorted(remaining))
+    ordered.insert(0, WAIT_OTHER)
+    return ordered
+
+
+@profiled('align')
+def align_stage_frames(frames, preferred_order):
+    # Közös stage sorrend, _StageSum és Wait/Other minden táblára, a hiányzó stage
+    # oszlopokat egyszerre, nullával töltve adjuk hozzá
+    import pandas as pd
+
+    stage_names = []
+    for df in frames:
+        stage_names.extend(col for col in df.columns if not col.startswith('_'))
+    all_stages = order_stages(stage_names, preferred_order)
+
+    aligned = []
+    for df in frames:
+        existing = [s for s in all_stages if s in df.columns and s != WAIT_OTHER]
+        stage_sum = df[existing].to_numpy(dtype=np.float64).sum(axis=1)
+        df = df.assign(_StageSum=stage_sum)
+        df[WAIT_OTHER] = np.maximum(df['_Total'].to_numpy(dtype=np.float64) - stage_sum, 0)
+        missing = [s for s in all_stages if s not in df.columns]
+        if missing:
+            zeros = pd.DataFrame(np.zeros((len(df), len(missing)), dtype=np.float32),
+                                 columns=missing, index=df.index)
+            df = pd.concat([df, zeros], axis=1)
+        aligned.append(df)
+    return aligned, all_stages
@@ -0,0 +1,117 @@
+import json
+import math
+import os
+
+# Relatív hibakorlátos, logaritmikus vödrös kvantilis vázlat (DDSketch jellegű): egy érték
+# hozzáadása O(1), két vázlat összefésülése vödrönkénti összeadás, így jobok/controllerek
+# között is pontosan összevonható. A visszaadott kvantilis legfeljebb SKETCH_ACCURACY
+# relatív hibával tér el a valódi (rendezett mintabeli) értéktől.
+SKETCH_ACCURACY = float(os.getenv("JENKINS_SKETCH_ACCURACY", "0.01"))
+
+
+class QuantileSketch:
+    __slots__ = ('accuracy', '_gamma_log', 'bins', 'zero_count', 'count', 'total', 'min', 'max')
+
+    def __init__(self, accuracy=SKETCH_ACCURACY):
+        self.accuracy = accuracy
+        self._gamma_log = math.log((1 + accuracy) / (1 - accuracy))
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        if value <= 0:
+            self.zero_count += 1
+            value = 0
+        else:
+            index = math.ceil(math.log(value) / self._gamma_log)
+            self.bins[index] = self.bins.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        if other.accuracy != self.accuracy:
+            raise ValueError(f"Eltérő pontosságú vázlatok: {self.accuracy} vs {other.accuracy}")
+        for index, n in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # A vödör [gamma^(i-1), gamma^i] közepe a relatív hibára nézve
+                value = 2 * math.exp(index * self._gamma_log) / (1 + math.exp(self._gamma_log))
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def count_at_most(self, value):
+        # Hisztogram vödörhöz: ennyi érték <= value (a vödör határán belüli pontossággal)
+        if value < 0:
+            return 0
+        n = self.zero_count
+        if value > 0:
+            limit = math.log(value) / self._gamma_log
+            n += sum(c for index, c in self.bins.items() if index <= limit)
+        return n
+
+    def to_json(self):
+        return json.dumps({'a': self.accuracy, 'z': self.zero_count, 'b': self.bins}, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, payload, count, total, min_value, max_value):
+        data = json.loads(payload)
+        sketch = cls(data['a'])
+        sketch.bins = {int(index): n for index, n in data['b'].items()}
+        sketch.zero_count = data['z']
+        sketch.count = count
+        sketch.total = total
+        sketch.min = min_value
+        sketch.max = max_value
+        return sketch
+
+
+def merge_sketches(sketch_maps):
+    # Több job {stage: vázlat} térképének összevonása (pl. egy mappa összes jobja)
+    merged = {}
+    for sketches in sketch_maps:
+        for stage, sketch in sketches.items():
+            if stage in merged:
+                merged[stage].merge(sketch)
+            else:
+                merged[stage] = QuantileSketch(sketch.accuracy).merge(sketch)
+    return merged
+
+
+def print_sketch_table(sketches, quantiles=(0.5, 0.95)):
+    header = ''.join(f"{f'p{round(q * 100)} (s)':>10}" for q in quantiles)
+    print(f"{'Stage':<35} {'Buildek':>8} {'Átlag (s)':>10}{header}")
+    print("-" * (55 + 10 * len(quantiles)))
+    for stage in sorted(sketches, key=lambda s: (s != '_Total', s)):
+        sketch = sketches[stage]
+        values = ''.join(f"{sketch.quantile(q) / 1000:>10.1f}" for q in quantiles)
+        print(f"{stage:<35} {sketch.count:>8} {sketch.mean / 1000:>10.1f}{values}")
@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+
+from profiler import profiled
+
+BOOTSTRAP_RESAMPLES = int(os.getenv("JENKINS_BOOTSTRAP_RESAMPLES", "10000"))
+QUANTILES = (0.5, 0.9)
+CONFIDENCE = 0.95
+
+# Egy n elemű minta k. rendezett eleme (k = ceil(q*n)) a visszatevéses újramintavételezésben
+# pontosan x[ceil(U*n) - 1], ahol U ~ Beta(k, n-k+1) – az n egyenletes húzás k. legkisebbike.
+# Így a teljes bootstrap eloszlás egyetlen (resamples x stages) méretű Beta mintából és egy
+# indexelésből jön, az n x resamples méretű újramintázott mátrix felépítése nélkül.
+
+
+def order_statistic_rank(n, q):
+    return min(max(int(np.ceil(q * n)), 1), n)
+
+
+def bootstrap_quantile(values, q, resamples=BOOTSTRAP_RESAMPLES, rng=None):
+    # values: (builds, stages) mátrix; vissza: a q kvantilis pontbecslése (stages,) és a
+    # bootstrap eloszlása (resamples, stages)
+    rng = np.random.default_rng(rng)
+    values = np.sort(np.asarray(values, dtype=np.float64), axis=0)
+    n, n_stages = values.shape
+    k = order_statistic_rank(n, q)
+    u = rng.beta(k, n - k + 1, size=(resamples, n_stages))
+    idx = np.minimum(np.ceil(u * n).astype(np.intp), n) - 1
+    np.maximum(idx, 0, out=idx)
+    samples = np.take_along_axis(values, idx, axis=0)
+    return values[k - 1], samples
+
+
+@profiled('bootstrap')
+def stage_differences(df_regi, df_uj, all_stages, quantiles=QUANTILES, resamples=BOOTSTRAP_RESAMPLES,
+                      confidence=CONFIDENCE, seed=0):
+    # Stage-enkénti (új - régi) kvantilis különbség percentilis bootstrap konfidencia intervallummal.
+    # A két job mintái függetlenek, ezért a két oldal eloszlása külön mintázható.
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    regi = df_regi[all_stages].to_numpy(dtype=np.float64)
+    uj = df_uj[all_stages].to_numpy(dtype=np.float64)
+    alpha = (1 - confidence) / 2
+
+    frames = []
+    for q in quantiles:
+        point_regi, samples_regi = bootstrap_quantile(regi, q, resamples, rng)
+        point_uj, samples_uj = bootstrap_quantile(uj, q, resamples, rng)
+        diffs = samples_uj - samples_regi
+        lo, hi = np.quantile(diffs, [alpha, 1 - alpha], axis=0)
+        frames.append(pd.DataFrame({
+            'Stage': all_stages,
+            'Kvantilis': f"p{round(q * 100)}",
+            'Régi (s)': point_regi,
+            'Új (s)': point_uj,
+            'Különbség (s)': point_uj - point_regi,
+            'CI alsó (s)': lo,
+            'CI felső (s)': hi,
+            'Szignifikáns': (lo > 0) | (hi < 0),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def print_stage_differences(result, confidence=CONFIDENCE):
+    print("\n" + "="*90)
+    print(f"STAGE-ENKÉNTI KVANTILIS KÜLÖNBSÉGEK ({confidence:.0%} bootstrap CI):")
+    print("="*90)
+    print(f"{'Stage':<25} {'Kv.':<5} {'Régi (s)':<11} {'Új (s)':<11} {'Különbség':<11} {'CI'}")
+    print("-"*90)
+    for row in result.itertuples(index=False):
+        stage, quantile, regi, uj, diff, lo, hi, significant = row
+        mark = " *" if significant else ""
+        print(f"{stage:<25} {quantile:<5} {regi:<11.2f} {uj:<11.2f} {diff:<+11.2f} [{lo:+.2f}, {hi:+.2f}]{mark}")
+    print("(* a CI nem tartalmazza a nullát)")
@@ -0,0 +1,185 @@
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import time
+
+from build_store import SCHEMA_VERSION, STORE_PATH
+
+# Ad hoc SQL a build store fölött, pandas nélkül. Nézetek: build_totals (buildenként teljes idő,
+# stage összeg, Wait/Other), stage_durations (stage futásonként egy sor, névvel és héttel),
+# stage_averages (a scriptek stage-enkénti átlag táblája). Aggregátumok: median(x), percentile(x, p).
+QUERY_ROW_LIMIT = int(os.getenv("JENKINS_QUERY_ROWS", "200"))
+
+# Kész lekérdezések, :név paraméterekkel
+PRESETS = {
+    'stage-weekly': (
+        "Egy stage heti medián és p95 ideje controllerenként (:stage)",
+        "SELECT controller, week, count(*) AS runs, round(median(duration_s), 1) AS p50_s, "
+        "round(percentile(duration_s, 95), 1) AS p95_s "
+        "FROM stage_durations WHERE stage = :stage GROUP BY controller, week ORDER BY controller, week"),
+    'job-weekly': (
+        "Jobonkénti heti build szám, teljes idő és Wait/Other",
+        "SELECT controller, job, week, count(*) AS builds, round(median(total_s), 1) AS p50_s, "
+        "round(percentile(total_s, 95), 1) AS p95_s, round(avg(wait_other_s), 1) AS wait_other_avg_s "
+        "FROM build_totals GROUP BY controller, job, week ORDER BY controller, job, week"),
+    'slowest-stages': (
+        "A legtöbb időt elvivő stage-ek az összes jobon (:limit)",
+        "SELECT stage, count(*) AS runs, round(sum(duration_s) / 3600, 1) AS hours, "
+        "round(median(duration_s), 1) AS p50_s, round(percentile(duration_s, 95), 1) AS p95_s "
+        "FROM stage_durations GROUP BY stage ORDER BY hours DESC LIMIT :limit"),
+}
+
+
+class Percentile:
+    # Lineáris interpoláció a rendezett értékek között (mint a numpy alapértelmezése)
+    def __init__(self):
+        self.values = []
+        self.p = None
+
+    def step(self, value, p=50):
+        if value is not None:
+            self.values.append(value)
+            self.p = p
+
+    def finalize(self):
+        if not self.values:
+            return None
+        values = sorted(self.values)
+        pos = (len(values) - 1) * min(max(self.p, 0), 100) / 100
+        low = math.floor(pos)
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+class Median(Percentile):
+    def step(self, value):
+        super().step(value, 50)
+
+
+def connect(path=STORE_PATH):
+    # Csak olvasható kapcsolat (WAL módban a futó fetch nem blokkolja), a store-ba nem írunk: a
+    # nézeteket az író parancsok (fetch, watch, ...) hozzák létre a séma frissítésekor
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Nincs ilyen store: {path}")
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < SCHEMA_VERSION:
+        conn.close()
+        raise RuntimeError(f"a store sémája régebbi (v{version}, kell: v{SCHEMA_VERSION}); frissítsd egy "
+                           f"író paranccsal, pl. 'python jenkins_reports.py fetch <job URL>'")
+    conn.create_aggregate('percentile', 2, Percentile)
+    conn.create_aggregate('median', 1, Median)
+    return conn
+
+
+def run_query(conn, sql, params=None):
+    # (oszlopnevek, sor iterátor); a sorok a kurzorból folyamatosan jönnek
+    cursor = conn.execute(sql, params or {})
+    return [d[0] for d in cursor.description or ()], cursor
+
+
+def _format(value):
+    if isinstance(value, float):
+        return f"{value:.1f}" if abs(value) >= 0.1 or value == 0 else f"{value:.3g}"
+    return "" if value is None else str(value)
+
+
+def print_rows(columns, rows, limit=QUERY_ROW_LIMIT):
+    shown = []
+    total = 0
+    for row in rows:
+        total += 1
+        if limit and len(shown) >= limit:
+            continue
+        shown.append([_format(v) for v in row])
+    widths = [max([len(c)] + [len(r[i]) for r in shown]) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("-" * (sum(widths) + 2 * max(len(widths) - 1, 0)))
+    for r in shown:
+        print("  ".join(v.rjust(w) if v[:1].isdigit() or v[:1] == '-' else v.ljust(w) for v, w in zip(r, widths)))
+    if total > len(shown):
+        print(f"... további {total - len(shown)} sor (--limit 0: mind)")
+    return total
+
+
+def write_rows(columns, rows, filename, spreadsheet=True):
+    # Az eredmény fájlba, az export formátumaival (.csv, .csv.gz, .ndjson, .parquet, ...)
+    import pandas as pd
+
+    from export import write_frames
+
+    return write_frames([pd.DataFrame(rows, columns=columns)], filename, spreadsheet=spreadsheet)
+
+
+def parse_params(items):
+    # név=érték párok; a számok számként kerülnek a lekérdezésbe
+    params = {}
+    for item in items:
+        name, _, value = item.partition('=')
+        try:
+            params[name] = int(value)
+        except ValueError:
+            try:
+                params[name] = float(value)
+            except ValueError:
+                params[name] = value
+    return params
+
+
+def query_main(sql, preset=None, params=(), output=None, limit=QUERY_ROW_LIMIT, plain_csv=False,
+               path=STORE_PATH):
+    if preset is not None:
+        sql = PRESETS[preset][1]
+    if not sql:
+        print("HIBA: adj meg egy SQL lekérdezést vagy egy --preset nevet.")
+        return 1
+    params = dict({'limit': 20}, **parse_params(params)) if preset else parse_params(params)
+    try:
+        conn = connect(path)
+    except (OSError, RuntimeError, sqlite3.Error) as e:
+        print(f"HIBA: {e}")
+        return 1
+    start = time.perf_counter()
+    try:
+        columns, rows = run_query(conn, sql, params)
+        if output:
+            count = write_rows(columns, rows.fetchall(), output, spreadsheet=not plain_csv)
+            print(f"✓ {count} sor mentve: {output}")
+        else:
+            count = print_rows(columns, rows, limit)
+    except sqlite3.Error as e:
+        print(f"HIBA: {e}")
+        return 1
+    finally:
+        conn.close()
+    print(f"({count} sor, {time.perf_counter() - start:.3f} s)", file=sys.stderr)
+    return 0
+
+
+def add_query_args(parser):
+    parser.add_argument('sql', nargs='?', default=None, help="SQL lekérdezés a store nézetein és táblái fölött")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default=None, help="Kész lekérdezés")
+    parser.add_argument('-p', '--param', action='append', default=[], metavar='NAME=VALUE',
+                        help="A :NAME paraméter értéke (ismételhető)")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Eredmény fájlba (.csv, .csv.gz, .ndjson, .parquet), különben táblázat")
+    parser.add_argument('--plain-csv', action='store_true', help="',' elválasztó és '.' tizedesjel")
+    parser.add_argument('--limit', type=int, default=QUERY_ROW_LIMIT,
+                        help="Legfeljebb ennyi sor kiírása, 0 = mind (JENKINS_QUERY_ROWS)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="SQL lekérdezés a build store fölött",
+        epilog="Kész lekérdezések:\n" + "\n".join(f"  {name}: {text}" for name, (text, _) in sorted(PRESETS.items())),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_query_args(parser)
+    parser.add_argument('--store', default=STORE_PATH, help="A store fájl (JENKINS_STORE)")
+    args = parser.parse_args()
+    return query_main(args.sql, args.preset, args.param, args.output, args.limit, args.plain_csv, args.store)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import heapq
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from build_cache import is_finished
+from harvester import harvest_job
+from jenkins_fetch import controller_key, fetch_runs_if_changed, job_key
+
+WATCH_MIN_INTERVAL = float(os.getenv("JENKINS_WATCH_MIN_INTERVAL", "15"))
+WATCH_MAX_INTERVAL = float(os.getenv("JENKINS_WATCH_MAX_INTERVAL", "300"))
+WATCH_RECENT_BUILDS = int(os.getenv("JENKINS_WATCH_RECENT", "5"))
+HISTOGRAM_BUCKETS_S = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+
+class WatchedJob:
+    __slots__ = ('url', 'side', 'pair', 'user', 'token', 'controller', 'job',
+                 'interval', 'etag', 'last_modified', 'since', 'initialized')
+
+    def __init__(self, url, side, pair, user, token, interval):
+        self.url = url.rstrip('/')
+        self.side = side
+        self.pair = pair
+        self.user = user
+        self.token = token
+        self.controller, self.job = job_key(self.url)
+        self.interval = interval
+        self.etag = None
+        self.last_modified = None
+        self.since = None
+        self.initialized = False
+
+
+class JobWatcher:
+    # Több job folyamatos figyelése: feltételes, since-es wfapi/runs kérések, a változás
+    # nélküli jobok lekérdezési ideje duplázódik, új vagy futó build esetén visszaáll a minimumra
+    def __init__(self, store, min_interval=WATCH_MIN_INTERVAL, max_interval=WATCH_MAX_INTERVAL,
+                 recent=WATCH_RECENT_BUILDS):
+        self.store = store
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.recent = recent
+        self.jobs = []
+        self.pairs = []
+        self.counters = {}
+        self._metrics = ""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add_pair(self, name, old, new):
+        # old / new: (job URL, user, token)
+        pair = tuple(WatchedJob(url, side, name, user, token, self.min_interval)
+                     for side, (url, user, token) in (('old', old), ('new', new)))
+        self.pairs.append((name, pair))
+        self.jobs.extend(pair)
+
+    def _count(self, name, controller, n=1):
+        key = (name, controller)
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def poll(self, watched):
+        controller = controller_key(watched.url)
+        if not watched.initialized:
+            # Első kör: a szokásos inkrementális szinkron (kezdő ablak vagy since a store-ból)
+            self._count('requests', controller)
+            added = harvest_job(watched.url, watched.user, watched.token, f"{watched.pair} ({watched.side})",
+                                self.store)
+            self._count('builds_ingested', controller, added)
+            watched.initialized = True
+            return True
+
+        state = self.store.get_state(watched.controller, watched.job) or {'max_build_id': 0, 'pending': []}
+        pending = set(state['pending'])
+        # Futó build esetén since a legrégebbi futó elé mutat, hogy a lezárását is lássuk
+        since = min(pending) - 1 if pending else state['max_build_id']
+        if since != watched.since:
+            # Más since más erőforrás: a korábbi válasz validátorai nem érvényesek rá
+            watched.since = since
+            watched.etag = watched.last_modified = None
+        self._count('requests', controller)
+        builds, (watched.etag, watched.last_modified) = fetch_runs_if_changed(
+            f"{watched.url}/wfapi/runs", watched.user, watched.token, since=since,
+            etag=watched.etag, last_modified=watched.last_modified)
+        if builds is None:
+            self._count('not_modified', controller)
+            # Futó build mellett nem lassítunk, hogy a lezárását időben lássuk
+            return bool(pending)
+
+        known = self.store.known_ids(watched.controller, watched.job)
+        # A since-es válasz is csak az ablakot adja: ha két kör között több build futott le, mint
+        # amennyi belefér, a kimaradtakat a harvester lyuk- és backfill logikája tölti be
+        lowest = min((int(b['id']) for b in builds), default=since + 1)
+        if set(range(since + 1, lowest)) - known:
+            self._count('requests', controller)
+            added = harvest_job(watched.url, watched.user, watched.token, f"{watched.pair} ({watched.side})",
+                                self.store)
+            self._count('builds_ingested', controller, added)
+            return True
+
+        fresh = [b for b in builds if int(b['id']) not in known]
+        finished = [b for b in fresh if is_finished(b)]
+        added = self.store.append(watched.controller, watched.job, finished)
+        self._count('builds_ingested', controller, added)
+        running = {int(b['id']) for b in fresh if not is_finished(b)}
+        max_id = max([state['max_build_id']] + [int(b['id']) for b in builds])
+        self.store.set_state(watched.controller, watched.job, max_id, running)
+        if added:
+            print(f"  {watched.pair} ({watched.side}): {added} új build, futásban: {len(running)}")
+        return bool(added or running)
+
+    def _recent_means(self, watched):
+        # Az utolsó N lezárt build stage-enkénti átlaga (s), pandas nélkül
+        builds = self.store.load_builds(watched.controller, watched.job, last_n=self.recent)
+        sums = {}
+        for build in builds:
+            for stage in build['stages']:
+                sums[stage['name']] = sums.get(stage['name'], 0) + stage['durationMillis']
+        return {name: total / len(builds) / 1000 for name, total in sums.items()}
+
+    def render_metrics(self):
+        lines = [
+            "# HELP jenkins_stage_duration_seconds Stage időtartamok a teljes tárolt történetből.",
+            "# TYPE jenkins_stage_duration_seconds histogram",
+        ]
+        p50_deltas = []
+        recent_deltas = []
+        for name, (old, new) in self.pairs:
+            p50 = {}
+            for watched in (old, new):
+                labels = f'pair="{name}",side="{watched.side}",job="{watched.job}"'
+                p50[watched.side] = {}
+                sketches = self.store.stage_sketches(watched.controller, watched.job)
+                for stage, sketch in sorted(sketches.items()):
+                    stage_labels = f'{labels},stage="{_escape(stage)}"'
+                    for bound in HISTOGRAM_BUCKETS_S:
+                        lines.append(f'jenkins_stage_duration_seconds_bucket{{{stage_labels},le="{bound}"}} '
+                                     f'{sketch.count_at_most(bound * 1000)}')
+                    lines.append(f'jenkins_stage_duration_seconds_bucket{{{stage_labels},le="+Inf"}} '
+                                 f'{sketch.count}')
+                    lines.append(f'jenkins_stage_duration_seconds_sum{{{stage_labels}}} {sketch.total / 1000}')
+                    lines.append(f'jenkins_stage_duration_seconds_count{{{stage_labels}}} {sketch.count}')
+                    p50[watched.side][stage] = sketch.quantile(0.5) / 1000
+            recent_old = self._recent_means(old)
+            recent_new = self._recent_means(new)
+            for stage in sorted(set(p50['old']) & set(p50['new'])):
+                labels = f'pair="{name}",stage="{_escape(stage)}"'
+                p50_deltas.append(f'jenkins_stage_p50_delta_seconds{{{labels}}} '
+                                  f'{p50["new"][stage] - p50["old"][stage]:.3f}')
+            for stage in sorted(set(recent_old) & set(recent_new)):
+                labels = f'pair="{name}",stage="{_escape(stage)}"'
+                recent_deltas.append(f'jenkins_stage_recent_mean_delta_seconds{{{labels}}} '
+                                     f'{recent_new[stage] - recent_old[stage]:.3f}')
+
+        lines.append("# HELP jenkins_stage_p50_delta_seconds Új - régi medián stage időtartam.")
+        lines.append("# TYPE jenkins_stage_p50_delta_seconds gauge")
+        lines.extend(p50_deltas)
+        lines.append(f"# HELP jenkins_stage_recent_mean_delta_seconds Új - régi átlag az utolsó "
+                     f"{self.recent} buildre.")
+        lines.append("# TYPE jenkins_stage_recent_mean_delta_seconds gauge")
+        lines.extend(recent_deltas)
+        for counter in ('requests', 'not_modified', 'builds_ingested'):
+            lines.append(f"# TYPE jenkins_watch_{counter}_total counter")
+            for (name, controller), value in sorted(self.counters.items()):
+                if name == counter:
+                    lines.append(f'jenkins_watch_{counter}_total{{controller="{controller}"}} {value}')
+        lines.append("# TYPE jenkins_watch_poll_interval_seconds gauge")
+        for watched in self.jobs:
+            lines.append(f'jenkins_watch_poll_interval_seconds{{pair="{watched.pair}",side="{watched.side}"}} '
+                         f'{watched.interval:g}')
+        return "\n".join(lines) + "\n"
+
+    @property
+    def metrics(self):
+        with self._lock:
+            return self._metrics
+
+    def run(self, max_cycles=None):
+        queue = [(0.0, i) for i in range(len(self.jobs))]
+        heapq.heapify(queue)
+        cycles = 0
+        while queue and not self._stop.is_set():
+            due, i = heapq.heappop(queue)
+            wait = due - time.monotonic()
+            if wait > 0 and self._stop.wait(wait):
+                break
+            watched = self.jobs[i]
+            try:
+                changed = self.poll(watched)
+            except Exception as e:
+                print(f"  HIBA: {watched.url} ({e})")
+                changed = False
+            watched.interval = self.min_interval if changed else min(watched.interval * 2, self.max_interval)
+            heapq.heappush(queue, (time.monotonic() + watched.interval, i))
+            try:
+                metrics = self.render_metrics()
+            except Exception as e:
+                # Átmeneti store hiba: a végpont a korábbi metrikákat adja tovább
+                print(f"  HIBA: metrikák frissítése ({e})")
+            else:
+                with self._lock:
+                    self._metrics = metrics
+            cycles += 1
+            if max_cycles is not None and cycles >= max_cycles:
+                break
+
+    def stop(self):
+        self._stop.set()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.server.watcher.metrics.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(watcher, host='127.0.0.1', port=9108):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.watcher = watcher
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,118 @@
+import codecs
+import json
+import time
+
+import profiler
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_END = object()
+_DELIMITERS = _WHITESPACE + ',]'
+
+
+class StreamError(ValueError):
+    pass
+
+
+def _skip(buf, pos, chars=_WHITESPACE):
+    while pos < len(buf) and buf[pos] in chars:
+        pos += 1
+    return pos
+
+
+def iter_json_array(chunks):
+    # Egy legfelső szintű JSON tömb elemeit adja vissza egyenként, ahogy a bájtok
+    # megérkeznek. A memóriában egyszerre csak egy elem és a hozzá tartozó puffer van.
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+
+    def more():
+        nonlocal buf, pos, eof
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            buf = buf[pos:] + text_decoder.decode(b'', final=True)
+            pos = 0
+            eof = True
+            return
+        buf = buf[pos:] + text_decoder.decode(chunk)
+        pos = 0
+
+    while True:
+        pos = _skip(buf, pos, _WHITESPACE + (',' if started else ''))
+        if pos >= len(buf):
+            if eof:
+                raise StreamError("váratlan vége a JSON tömbnek")
+            more()
+            continue
+        if not started:
+            if buf[pos] != '[':
+                raise StreamError(f"JSON tömböt vártunk, kaptuk: {buf[pos]!r}")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == ']':
+            return
+
+        # Sikertelen dekódolás után legalább a puffer méretének megfelelő új adatot
+        # olvasunk, így egy nagy elem újrapróbálása összességében lineáris marad
+        while True:
+            try:
+                item, end = _decoder.raw_decode(buf, pos)
+                # Objektum, tömb vagy string vége nem folytatódhat; egy szám (vagy literál) csak
+                # akkor teljes, ha elválasztó követi vagy vége a bemenetnek
+                if buf[end - 1] in '}]"' or eof or (end < len(buf) and buf[end] in _DELIMITERS):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            target = len(buf) - pos
+            while not eof and len(buf) - pos < 2 * target:
+                more()
+        pos = end
+        yield item
+
+
+def _timed_chunks(chunks, stats):
+    # A socket olvasás (iter_content) ideje és a kicsomagolt bájtok száma
+    clock = time.perf_counter
+    chunks = iter(chunks)
+    while True:
+        start = clock()
+        chunk = next(chunks, None)
+        stats['read_s'] += clock() - start
+        if chunk is None:
+            return
+        stats['body_bytes'] += len(chunk)
+        yield chunk
+
+
+def iter_response_array(response, chunk_size=CHUNK_SIZE, stats=None):
+    # requests válasz (stream=True) törzsének feldolgozása. A stats-ba kerül a kicsomagolt
+    # bájtok száma, a socket olvasás és a JSON dekódolás ideje; a fogyasztó munkája egyikben sincs
+    # benne. Profilozáskor a kettő 'http.read' és 'decode' fázisként a fogyasztó fázisán belül jelenik meg.
+    stats = {} if stats is None else stats
+    stats.update(body_bytes=0, read_s=0.0, decode_s=0.0)
+    clock = time.perf_counter
+    items = iter_json_array(_timed_chunks(response.iter_content(chunk_size), stats))
+    origin = clock()
+    pull_s = 0.0
+    try:
+        while True:
+            start = clock()
+            item = next(items, _END)
+            pull_s += clock() - start
+            if item is _END:
+                return
+            yield item
+    finally:
+        response.close()
+        stats['decode_s'] = max(pull_s - stats['read_s'], 0.0)
+        profiler.record_phase('http.read', origin, stats['read_s'])
+        profiler.record_phase('decode', origin + stats['read_s'], stats['decode_s'])